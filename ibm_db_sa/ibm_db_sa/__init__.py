@@ -31,7 +31,8 @@ from .base import \
     DECIMAL, DOUBLE, DECIMAL,\
     GRAPHIC, INTEGER, INTEGER, LONGVARCHAR, \
     NUMERIC, SMALLINT, REAL, TIME, TIMESTAMP, \
-    VARCHAR, VARGRAPHIC, dialect
+    VARCHAR, VARGRAPHIC, dialect, keyset_select, walk_keyset, merge, \
+    fetch_columns
 
 #__all__ = (
     # TODO: (put types here)
@@ -21,19 +21,21 @@
 
 """
 import datetime
-from sqlalchemy import exc
+import re
+import threading
+from sqlalchemy import event, exc
 from sqlalchemy import types as sa_types
 from sqlalchemy import schema as sa_schema
 from sqlalchemy import sql
 from sqlalchemy import util
-from sqlalchemy.sql import compiler
-from sqlalchemy.engine import default
+from sqlalchemy.sql import compiler, operators, util as sql_util
+from sqlalchemy.engine import default, reflection, result
 
 from . import reflection as ibm_reflection
 
 from sqlalchemy.types import BLOB, CHAR, CLOB, DATE, DATETIME, INTEGER,\
     SMALLINT, BIGINT, DECIMAL, NUMERIC, REAL, TIME, TIMESTAMP,\
-    VARCHAR
+    VARCHAR, BOOLEAN, BINARY, VARBINARY
 
 
 # as documented from:
@@ -109,6 +111,17 @@ RESERVED_WORDS = set(
     'regr_count', 'within'])
 
 
+# textual statements after which cached catalog information is discarded
+DDL_RE = re.compile(r'\s*(?:CREATE|DROP|ALTER|RENAME)\b', re.I | re.UNICODE)
+
+# hints of a SELECT rendered as clauses following it
+SELECT_CLAUSE_RE = re.compile(r'\s*(?:FOR (?:READ|FETCH) (ONLY)|'
+                              r'OPTIMIZE FOR (\d+) ROWS?|'
+                              r'WITH (UR|CS|RS|RR))\s*', re.I)
+
+ISOLATION_LEVELS = set(['UR', 'CS', 'RS', 'RR'])
+
+
 class _IBM_Date(sa_types.Date):
 
     def result_processor(self, dialect, coltype):
@@ -132,6 +145,9 @@ class _IBM_Date(sa_types.Date):
 class DOUBLE(sa_types.Numeric):
     __visit_name__ = 'DOUBLE'
 
+class DECFLOAT(sa_types.Numeric):
+    __visit_name__ = 'DECFLOAT'
+
 class LONGVARCHAR(sa_types.VARCHAR):
     __visit_name_ = 'LONGVARCHAR'
 
@@ -171,6 +187,12 @@ ischema_names = {
     'NUMERIC': NUMERIC,
     'REAL': REAL,
     'DOUBLE': DOUBLE,
+    'DECFLOAT': DECFLOAT,
+    'BOOLEAN': BOOLEAN,
+    'BINARY': BINARY,
+    'VARBINARY': VARBINARY,
+    # On z/OS, SYSIBM.SYSCOLUMNS.COLTYPE returns "VARBIN"
+    'VARBIN': VARBINARY,
     'TIME': TIME,
     'TIMESTAMP': TIMESTAMP,
     # On z/OS, SYSIBM.SYSCOLUMNS.COLTYPE returns "TIMESTMP"
@@ -185,6 +207,13 @@ ischema_names = {
 }
 
 
+# the longest VARCHAR and VARGRAPHIC, in bytes and double-byte characters
+MAX_STRING_LENGTHS = {
+    'VARCHAR': 32672,
+    'VARGRAPHIC': 16336,
+}
+
+
 class DB2TypeCompiler(compiler.GenericTypeCompiler):
 
 
@@ -246,6 +275,10 @@ class DB2TypeCompiler(compiler.GenericTypeCompiler):
         return "GRAPHIC" if type_.length in (None, 0) else \
                 "GRAPHIC(%(length)s)" % {'length': type_.length}
 
+    def visit_DECFLOAT(self, type_):
+        return "DECFLOAT" if not type_.precision else \
+                "DECFLOAT(%(precision)s)" % {'precision': type_.precision}
+
     def visit_DECIMAL(self, type_):
         if not type_.precision:
             return "DECIMAL(31, 0)"
@@ -295,6 +328,9 @@ class DB2TypeCompiler(compiler.GenericTypeCompiler):
 
 class DB2Compiler(compiler.SQLCompiler):
 
+    # sequence defaults of an INSERT to render as bind parameters, see
+    # _get_colparams()
+    _sequence_columns = None
 
     def visit_now_func(self, fn, **kw):
         return "CURRENT_TIMESTAMP"
@@ -303,6 +339,61 @@ class DB2Compiler(compiler.SQLCompiler):
         return "mod(%s, %s)" % (self.process(binary.left),
                                                 self.process(binary.right))
 
+    def visit_in_op_binary(self, binary, operator, **kw):
+        return self._in_list(binary, operator, " IN ", **kw)
+
+    def visit_notin_op_binary(self, binary, operator, **kw):
+        return self._in_list(binary, operator, " NOT IN ", **kw)
+
+    def _in_list(self, binary, operator, opstring, **kw):
+        """Render an IN list of bound values, padded up to the next power
+        of two by repeating its last value when ``in_list_bucketing`` is
+        on, so that the statement text only depends on the size bucket.
+        Buckets above ``in_list_values_threshold`` are rendered as a
+        subquery on a ``VALUES`` table instead.
+
+        """
+        values = None
+        if self.dialect.in_list_bucketing and \
+                isinstance(binary.right, sql.expression.Grouping) and \
+                isinstance(binary.right.element, sql.expression.ClauseList):
+            values = binary.right.element.clauses
+            for value in values:
+                if not isinstance(value, sql.expression.BindParameter):
+                    values = None
+                    break
+        if not values:
+            return self._generate_generic_binary(binary, opstring, **kw)
+
+        size = 1
+        while size < len(values):
+            size *= 2
+        values = list(values) + [values[-1]] * (size - len(values))
+
+        left = self.process(binary.left, **kw)
+        threshold = self.dialect.in_list_values_threshold
+        if threshold is None or size <= threshold or \
+                isinstance(binary.left.type, sa_types.NullType):
+            return "%s%s(%s)" % (left, opstring,
+                    ", ".join(self.process(v, **kw) for v in values))
+
+        type_ = self._parameter_type(binary.left.type)
+        return "%s%s(SELECT db2_in.v FROM (VALUES %s) AS db2_in (v))" % (
+                    left, opstring,
+                    ", ".join("CAST(%s AS %s)" % (self.process(v, **kw), type_)
+                                for v in values))
+
+    def _parameter_type(self, type_):
+        """Return the type to which parameter markers of ``type_`` are
+        cast in a VALUES list, where they must be typed.  Strings of no
+        given length are cast to the longest VARCHAR or VARGRAPHIC."""
+        text = self.dialect.type_compiler.process(type_)
+        if text.endswith("(None)"):
+            name = text[:-len("(None)")]
+            if name in MAX_STRING_LENGTHS:
+                text = "%s(%d)" % (name, MAX_STRING_LENGTHS[name])
+        return text
+
     def visit_true(self, expr, **kw):
         return '1'
 
@@ -310,17 +401,27 @@ class DB2Compiler(compiler.SQLCompiler):
         return '0'
 
     def limit_clause(self, select):
-        if not select._offset and select._limit is not None:
+        if select._offset and self.dialect.supports_offset_fetch:
+            text = " OFFSET %s ROWS" % self.process(sql.literal(select._offset))
+            if select._limit is not None:
+                text += " FETCH NEXT %s ROWS ONLY" % select._limit
+            return text
+        elif not select._offset and select._limit is not None:
             return " FETCH FIRST %s ROWS ONLY" % select._limit
         else:
             return ""
 
     def visit_select(self, select, **kwargs):
         """Look for ``LIMIT`` and OFFSET in a select statement, and if
-        so tries to wrap it in a subquery with ``row_number()`` criterion.
+        so tries to wrap it in a subquery with ``row_number()`` criterion,
+        unless the server supports ``OFFSET`` natively.
 
         """
-        if select._offset and not getattr(select, '_db2_visit', None):
+        # the clauses following the query are those of the select given,
+        # not of the ROW_NUMBER() wrapper's alias
+        suffix = not self.stack and self.select_suffix(select) or ""
+        if select._offset and not self.dialect.supports_offset_fetch and \
+                not getattr(select, '_db2_visit', None):
             # to use ROW_NUMBER(), an ORDER BY is required.
             if not select._order_by_clause.clauses:
                 raise exc.CompileError('DB2 requires an order_by when '
@@ -342,11 +443,63 @@ class DB2Compiler(compiler.SQLCompiler):
             limitselect.append_whereclause(db2_rn > _offset)
             if _limit is not None:
                 limitselect.append_whereclause(db2_rn <= (_limit + _offset))
-            return self.process(limitselect, iswrapper=True, **kwargs)
+            text = self.process(limitselect, iswrapper=True, **kwargs)
         else:
-            return compiler.SQLCompiler.visit_select(self, select, **kwargs)
+            text = compiler.SQLCompiler.visit_select(self, select, **kwargs)
+        return text + suffix
+
+    def select_suffix(self, select):
+        """Return the clauses following a top level SELECT, from its
+        ``db2_read_only``, ``db2_optimize_for`` and ``db2_isolation``
+        execution options, or from its hints for this dialect, e.g.
+        ``with_hint(table, "WITH UR", "db2")``.  A streamed SELECT is
+        read only unless it is FOR UPDATE.
+
+        """
+        options = select._execution_options
+        read_only = options.get('db2_read_only')
+        if read_only is None and options.get('stream_results'):
+            read_only = not select.for_update
+        optimize_for = options.get('db2_optimize_for')
+        isolation = options.get('db2_isolation')
+        for (from_, dialect_name), hint in select._hints.iteritems():
+            if dialect_name != self.dialect.name:
+                continue
+            pos = 0
+            while pos < len(hint):
+                m = SELECT_CLAUSE_RE.match(hint, pos)
+                if m is None:
+                    raise exc.CompileError("Unsupported DB2 hint: %r" % hint)
+                if m.group(1):
+                    read_only = True
+                elif m.group(2):
+                    optimize_for = int(m.group(2))
+                else:
+                    isolation = m.group(3)
+                pos = m.end()
+
+        text = ""
+        if read_only:
+            if select.for_update:
+                raise exc.CompileError("FOR READ ONLY can't be combined "
+                                       "with FOR UPDATE")
+            text += " FOR READ ONLY"
+        if optimize_for:
+            text += " OPTIMIZE FOR %d ROWS" % optimize_for
+        if isolation:
+            isolation = isolation.upper()
+            if isolation not in ISOLATION_LEVELS:
+                raise exc.CompileError("Unknown isolation clause: WITH %s"
+                                       % isolation)
+            text += " WITH %s" % isolation
+        return text
 
     def visit_sequence(self, sequence):
+        if self._sequence_columns:
+            for c in self._sequence_columns:
+                if c.default is sequence:
+                    self._sequence_columns.remove(c)
+                    return self._create_crud_bind_param(c, None)
         return "NEXT VALUE FOR %s" % sequence.name
 
     def default_from(self):
@@ -378,11 +531,395 @@ class DB2Compiler(compiler.SQLCompiler):
              " ON ",
              self.process(join.onclause, **kwargs)))
 
+    def visit_merge(self, merge, **kw):
+        preparer = self.preparer
+        source = "db2_src"
+        columns = [preparer.format_column(c) for c in merge.columns]
+
+        if merge.select is not None:
+            # the source query doesn't correlate to the target table
+            self.stack.append({'correlate_froms': set(), 'iswrapper': False,
+                               'asfrom_froms': set()})
+            rows = self.process(merge.select, asfrom=True, **kw)
+            self.stack.pop(-1)
+        else:
+            types = [self._parameter_type(c.type) for c in merge.columns]
+            rows = "(VALUES %s)" % ", ".join("(%s)" % ", ".join(
+                        "CAST(%s AS %s)" % (self.process(bind, **kw), type_)
+                            for bind, type_ in zip(row, types))
+                    for row in merge.rows)
+
+        text = "MERGE INTO %s USING %s AS %s (%s) ON %s" % (
+                preparer.format_table(merge.table), rows,
+                source, ", ".join(columns),
+                " AND ".join("%s.%s = %s.%s" % (
+                        preparer.format_table(merge.table),
+                        preparer.format_column(c), source,
+                        preparer.format_column(c))
+                    for c in merge.on))
+        if merge.update:
+            text += " WHEN MATCHED THEN UPDATE SET %s" % ", ".join(
+                    "%s = %s.%s" % (preparer.format_column(c), source,
+                                    preparer.format_column(c))
+                        for c in merge.update)
+        if merge.insert:
+            text += " WHEN NOT MATCHED THEN INSERT (%s) VALUES (%s)" % (
+                    ", ".join(columns),
+                    ", ".join("%s.%s" % (source, column)
+                                for column in columns))
+        return text
+
+    def returning_clause(self, stmt, returning_cols):
+        """Label the columns returned by ``stmt``, which visit_insert(),
+        visit_update() and visit_delete() select from the changed rows,
+        and render nothing in the statement itself."""
+        adapter = sql_util.ClauseAdapter(stmt.table.alias("db2_changed"))
+        self.returning_columns = ", ".join(
+                self._label_select_column(None, adapter.traverse(c),
+                                          True, False, {})
+                    for c in sql.expression._select_iterables(returning_cols))
+        return ""
+
+    def _select_changed_rows(self, text, table):
+        """Wrap a data change statement with RETURNING columns into the
+        SELECT of these columns from its ``table`` of changed rows."""
+        if not self.returning:
+            return text
+        return "SELECT %s FROM %s TABLE (%s) AS db2_changed" % (
+                    self.returning_columns, table, text.rstrip())
+
+    def visit_update(self, update_stmt, **kw):
+        return self._select_changed_rows(
+                compiler.SQLCompiler.visit_update(self, update_stmt, **kw),
+                "FINAL")
+
+    def visit_delete(self, delete_stmt, **kw):
+        return self._select_changed_rows(
+                compiler.SQLCompiler.visit_delete(self, delete_stmt, **kw),
+                "OLD")
+
+    def _get_colparams(self, stmt, extra_tables=None):
+        if not self.isinsert or self.inline or \
+                self.dialect._sequence_values is None or \
+                stmt.select is not None or \
+                getattr(stmt, '_has_multi_parameters', False):
+            return compiler.SQLCompiler._get_colparams(self, stmt,
+                                                       extra_tables)
+        # with sequence_prefetch, the sequence defaults of a single row
+        # INSERT are rendered as bind parameters by visit_sequence() and
+        # executed ahead of it, taking their values from
+        # DB2Dialect._sequence_values.  Inline and executemany() INSERTs,
+        # for which SQLAlchemy can't pre-execute sequences, keep NEXT VALUE
+        # FOR
+        self._sequence_columns = [c for c in stmt.table.c
+                                  if c.default is not None and
+                                     c.default.is_sequence]
+        try:
+            values = compiler.SQLCompiler._get_colparams(self, stmt,
+                                                         extra_tables)
+            prefetched = [c for c in stmt.table.c
+                          if c.default is not None and
+                             c.default.is_sequence and
+                             c not in self._sequence_columns]
+        finally:
+            self._sequence_columns = None
+        for c in prefetched:
+            if c in self.returning:
+                self.returning.remove(c)
+            if c in self.postfetch:
+                self.postfetch.remove(c)
+            self.prefetch.append(c)
+        return values
+
+    def visit_insert(self, insert_stmt, **kw):
+        text = compiler.SQLCompiler.visit_insert(self, insert_stmt, **kw)
+        # the row of a single row INSERT, which may be repeated to insert
+        # many rows at once, see DB2Dialect.do_executemany()
+        self.values_row = None
+        if insert_stmt.select is None and not self.returning and \
+                not getattr(insert_stmt, '_has_multi_parameters', False):
+            pos = text.rfind(" VALUES (")
+            if pos != -1:
+                self.values_row = text[pos + len(" VALUES "):]
+        return self._select_changed_rows(text, "FINAL")
+
     def visit_savepoint(self, savepoint_stmt):
         return ("SAVEPOINT %s ON ROLLBACK RETAIN CURSORS"
             % self.preparer.format_savepoint(savepoint_stmt))
 
 
+def _keyset_columns(key_columns):
+    """Return (column, descending) pairs for ``key_columns``, which may be
+    wrapped in ``desc()``/``asc()``."""
+    keys = []
+    for key in key_columns:
+        if isinstance(key, sql.expression.UnaryExpression) and \
+                key.modifier in (operators.desc_op, operators.asc_op):
+            keys.append((key.element, key.modifier is operators.desc_op))
+        else:
+            keys.append((key, False))
+    return keys
+
+def _keyset_criterion(keys, values):
+    """Return the criterion selecting the rows after ``values`` in the
+    order of ``keys``.
+
+    (k1, k2) > (v1, v2) is spelled out as
+    k1 >= v1 AND (k1 > v1 OR (k1 = v1 AND k2 > v2)), the leading term
+    giving DB2 a range on which to start an index scan.
+    """
+    def after(column, descending, value):
+        if descending:
+            return column < value
+        return column > value
+    alternatives = []
+    for i, (column, descending) in enumerate(keys):
+        alternatives.append(sql.and_(*(
+                    [prev == values[j] for j, (prev, _) in enumerate(keys[:i])]
+                    + [after(column, descending, values[i])])))
+    criterion = sql.or_(*alternatives)
+    if len(keys) > 1:
+        column, descending = keys[0]
+        if descending:
+            start = column <= values[0]
+        else:
+            start = column >= values[0]
+        criterion = sql.and_(start, criterion)
+    return criterion
+
+def keyset_select(select, key_columns, after=None, page_size=1000):
+    """Return the page of ``select`` following the row whose values of
+    ``key_columns`` are ``after``, or the first page if that is None.
+
+    The key columns must identify a row, and should lead an index;
+    ``desc(column)`` pages in descending order.  They replace any ORDER BY
+    of ``select``.  Unlike OFFSET, which reads
+    and discards all the preceding rows, the statement seeks directly past
+    the previous page::
+
+        SELECT ... WHERE ... AND k1 >= ? AND (k1 > ? OR (k1 = ? AND k2 > ?))
+        ORDER BY k1, k2 FETCH FIRST 1000 ROWS ONLY OPTIMIZE FOR 1000 ROWS
+
+    """
+    keys = _keyset_columns(key_columns)
+    if after is not None:
+        select = select.where(_keyset_criterion(keys, after))
+    return select.order_by(None).order_by(*key_columns).limit(page_size).\
+                execution_options(db2_optimize_for=page_size)
+
+def walk_keyset(connection, select, key_columns, page_size=1000):
+    """Generate all the rows of ``select`` in the order of ``key_columns``,
+    fetching them ``page_size`` at a time with :func:`keyset_select`.
+
+    The statement for the next pages is compiled once, with the values of
+    the last row as bind parameters.
+    """
+    keys = _keyset_columns(key_columns)
+    names = ['db2_key_%d' % i for i in range(len(keys))]
+    next_page = keyset_select(select, key_columns,
+                    [sql.bindparam(name, type_=column.type)
+                        for name, (column, _) in zip(names, keys)],
+                    page_size).compile(bind=connection)
+
+    rows = connection.execute(
+                keyset_select(select, key_columns, page_size=page_size)
+            ).fetchall()
+    while True:
+        for row in rows:
+            yield row
+        if len(rows) < page_size:
+            break
+        last = rows[-1]
+        rows = connection.execute(next_page,
+                    dict((name, last[column])
+                        for name, (column, _) in zip(names, keys))
+                ).fetchall()
+
+
+class _ColumnBuffer(object):
+    """The values of one result column, decoded into NumPy arrays a batch
+    at a time, see :func:`fetch_columns`."""
+
+    def __init__(self, numpy, dtype, processor):
+        self.numpy = numpy
+        self.dtype = dtype
+        self.processor = processor
+        self.chunks = []
+        self.masks = []
+        self.nulls = False
+        if dtype is not object:
+            self.fill = numpy.zeros(1, dtype)[0]
+
+    def append(self, values):
+        numpy = self.numpy
+        if self.processor is not None:
+            values = map(self.processor, values)
+        mask = None
+        if None in values:
+            self.nulls = True
+            mask = numpy.array([value is None for value in values], bool)
+            if self.dtype is not object:
+                fill = self.fill
+                values = [value if value is not None else fill
+                          for value in values]
+        if self.dtype is object:
+            chunk = numpy.empty(len(values), object)
+            chunk[:] = values
+        else:
+            chunk = numpy.array(values, self.dtype)
+        self.chunks.append(chunk)
+        self.masks.append(mask)
+
+    def array(self):
+        numpy = self.numpy
+        if not self.chunks:
+            return numpy.empty(0, self.dtype)
+        data = numpy.concatenate(self.chunks)
+        if not self.nulls:
+            return data
+        mask = numpy.concatenate([
+                    mask if mask is not None else numpy.zeros(len(chunk), bool)
+                    for chunk, mask in zip(self.chunks, self.masks)])
+        return numpy.ma.masked_array(data, mask)
+
+
+# NumPy dtypes of result columns by type, the first match applying; the
+# values of other columns are kept as Python objects
+_COLUMN_DTYPES = [
+    (sa_types.Boolean, 'bool'),
+    (sa_types.SmallInteger, 'int16'),
+    (sa_types.BigInteger, 'int64'),
+    (sa_types.Integer, 'int32'),
+    (sa_types.Float, 'float64'),
+    (sa_types.DateTime, 'datetime64[us]'),
+    (sa_types.Date, 'datetime64[D]'),
+]
+
+
+def _column_dtype(type_):
+    for type_cls, dtype in _COLUMN_DTYPES:
+        if isinstance(type_, type_cls):
+            return dtype
+    if isinstance(type_, sa_types.Numeric) and not type_.asdecimal:
+        return 'float64'
+    return object
+
+
+def fetch_columns(connection, select, params=None, batch_size=10000):
+    """Execute ``select`` and return its columns as NumPy arrays, in an
+    OrderedDict by column key.
+
+    Boolean, integer, float and DATE/TIMESTAMP columns give arrays of the
+    matching dtype, other columns object arrays; columns with NULLs give
+    masked arrays.  Rows are fetched ``batch_size`` at a time straight from
+    the DBAPI cursor and decoded column by column with the result
+    processors of the dialect's types, without building a row object per
+    row.  Requires NumPy.
+    """
+    import numpy
+
+    dialect = connection.dialect
+    # a streamed result would buffer rows ahead of the cursor reads below
+    result = connection.execute(
+                select.execution_options(stream_results=False), params or {})
+    cursor = result.cursor
+    try:
+        buffers = []
+        for column, description in zip(select.c, cursor.description):
+            type_ = column.type.dialect_impl(dialect)
+            buffers.append(_ColumnBuffer(numpy, _column_dtype(type_),
+                            type_.result_processor(dialect, description[1])))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for buffer, values in zip(buffers, zip(*rows)):
+                buffer.append(list(values))
+            if len(rows) < batch_size:
+                break
+        return util.OrderedDict([(key, buffer.array())
+                    for key, buffer in zip(result.keys(), buffers)])
+    finally:
+        result.close()
+
+
+class Merge(sql.expression.UpdateBase):
+    """A ``MERGE INTO`` statement upserting rows into a table, see
+    :func:`merge`."""
+
+    __visit_name__ = 'merge'
+
+    def __init__(self, table, rows, on=None, update=None, insert=True):
+        self.table = table
+        self.select = None
+        if isinstance(rows, sql.expression.SelectBase):
+            self.select = rows
+            names = rows.c.keys()
+            keys = set(names)
+        else:
+            if not rows:
+                raise exc.ArgumentError("merge() requires at least one row")
+            keys = set(rows[0])
+            for row in rows:
+                if set(row) != keys:
+                    raise exc.ArgumentError("All the rows given to merge() "
+                                            "must have the same keys")
+            names = [c.key for c in table.c if c.key in keys]
+        if keys.difference(table.c.keys()):
+            raise exc.ArgumentError("Unknown columns for table %s: %s" % (
+                    table.description,
+                    ", ".join(sorted(keys.difference(table.c.keys())))))
+        self.columns = [table.c[name] for name in names]
+
+        if on is None:
+            on = table.primary_key.columns
+        self.on = [table.c[getattr(c, 'key', c)] for c in on]
+        if not self.on or [c for c in self.on if c.key not in keys]:
+            raise exc.ArgumentError("merge() requires key columns, "
+                                    "given a value in every row")
+        if update is None:
+            self.update = [c for c in self.columns if c not in self.on]
+        else:
+            self.update = [table.c[getattr(c, 'key', c)] for c in update]
+            if [c for c in self.update if c.key not in keys]:
+                raise exc.ArgumentError("merge() can only update columns "
+                                        "given a value in every row")
+        self.insert = insert
+        if not self.update and not self.insert:
+            raise exc.ArgumentError("merge() requires columns to update "
+                                    "or insert=True")
+
+        if self.select is not None:
+            self.rows = []
+        else:
+            self.rows = [[sql.bindparam(c.key, row[c.key], type_=c.type,
+                                        unique=True)
+                            for c in self.columns]
+                        for row in rows]
+
+    def get_children(self, **kwargs):
+        if self.select is not None:
+            return [self.select]
+        return [bind for row in self.rows for bind in row]
+
+def merge(table, rows, on=None, update=None, insert=True):
+    """Return a statement upserting ``rows``, a list of dictionaries
+    keyed by column or a select() of columns labeled by column key, into
+    ``table`` in one round trip::
+
+        MERGE INTO t USING (VALUES (?, ?), (?, ?)) AS db2_src (id, x)
+        ON t.id = db2_src.id
+        WHEN MATCHED THEN UPDATE SET x = db2_src.x
+        WHEN NOT MATCHED THEN INSERT (id, x) VALUES (db2_src.id, db2_src.x)
+
+    Rows are matched on the ``on`` columns, by default the primary key.
+    Matched rows get the ``update`` columns, by default all the other
+    columns of ``rows``; with ``update=()`` they are left as they are.
+    Rows not matched are inserted unless ``insert`` is false.
+    """
+    return Merge(table, rows, on, update, insert)
+
+
 class DB2DDLCompiler(compiler.DDLCompiler):
 
     def get_column_specification(self, column, **kw):
@@ -459,11 +996,120 @@ class DB2IdentifierPreparer(compiler.IdentifierPreparer):
         return self.initial_quote + identifier + self.final_quote
 
 
+class SequenceValues(object):
+    """Values of sequences fetched ahead, ``size`` at a time, and handed
+    out in order.
+
+    Handing out values and fetching new blocks are serialized by a lock,
+    so that each value is used once among the threads sharing a dialect.
+    Values left unused are lost, leaving gaps as a sequence CACHE does.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def next_value(self, key, fetch):
+        self._lock.acquire()
+        try:
+            values = self._values.get(key)
+            if not values:
+                # kept reversed, so that the next value is popped
+                values = self._values[key] = list(reversed(fetch(self.size)))
+            return values.pop()
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        self._lock.acquire()
+        try:
+            self._values.clear()
+        finally:
+            self._lock.release()
+
+
+class BlockResultProxy(result.BufferedRowResultProxy):
+    """ResultProxy fetching the rows of a streamed result a block of
+    ``stream_block_size`` rows at a time, from the first one on."""
+
+    size_growth = {}
+
+    def __init__(self, context):
+        self._bufsize = context._stream_block_size
+        super(BlockResultProxy, self).__init__(context)
+
+
 class DB2ExecutionContext(default.DefaultExecutionContext):
+
+    # total of the statements an executemany() was split into
+    _rowcount = None
+
+    # rows fetched at a time with stream_results
+    _stream_block_size = None
+
+    @property
+    def rowcount(self):
+        if self._rowcount is not None:
+            return self._rowcount
+        return self.cursor.rowcount
+
+    def create_cursor(self):
+        if not self.execution_options.get('stream_results'):
+            return self.create_dbapi_cursor()
+        self._stream_block_size = int(self.execution_options.get(
+                'db2_stream_block_size', self.dialect.stream_block_size))
+        cursor = self.create_stream_cursor()
+        # the default of fetchmany(); neither ibm_db nor pyodbc has a
+        # statement option for the rows the server sends at once
+        cursor.arraysize = self._stream_block_size
+        return cursor
+
+    def create_dbapi_cursor(self):
+        return self._dbapi_connection.cursor()
+
+    def create_stream_cursor(self):
+        """Return a forward-only, read-only cursor, which DBAPI cursors of
+        DB2 drivers are by default."""
+        return self.create_dbapi_cursor()
+
+    def get_result_proxy(self):
+        # INSERT, UPDATE and DELETE statements have no rows to stream
+        if self._stream_block_size and self.cursor.description is not None:
+            return BlockResultProxy(self)
+        return default.DefaultExecutionContext.get_result_proxy(self)
+
     def fire_sequence(self, seq, type_):
-        return self._execute_scalar("SELECT NEXTVAL FOR " +
-                    self.dialect.identifier_preparer.format_sequence(seq) +
-                    " FROM SYSIBM.SYSDUMMY1", type_)
+        name = self.dialect.identifier_preparer.format_sequence(seq)
+        if self.dialect._sequence_values is not None:
+            return self.dialect._sequence_values.next_value(name,
+                    lambda size: self._fetch_sequence_values(seq, type_, size))
+        return self._execute_scalar("SELECT NEXTVAL FOR " + name +
+                                    " FROM SYSIBM.SYSDUMMY1", type_)
+
+    def _fetch_sequence_values(self, seq, type_, size):
+        """Return the next ``size`` values of ``seq``, in the order the
+        server generated them."""
+        stmt = self.dialect._sequence_values_sql(
+                self.dialect.identifier_preparer.format_sequence(seq), size)
+        if isinstance(stmt, unicode) and \
+                not self.dialect.supports_unicode_statements:
+            stmt = self.dialect._encoder(stmt)[0]
+        if self.dialect.positional:
+            params = self.dialect.execute_sequence_format()
+        else:
+            params = {}
+        self.root_connection._cursor_execute(self.cursor, stmt, params,
+                                             context=self)
+        values = [row[0] for row in self.cursor.fetchall()]
+        if type_ is not None:
+            proc = type_._cached_result_processor(self.dialect,
+                                        self.cursor.description[0][1])
+            if proc:
+                values = [proc(value) for value in values]
+        # NEXT VALUE FOR is evaluated as the rows are produced, so they come
+        # in the order of the sequence, even one which cycles or descends
+        return values
 
 
 class _SelectLastRowIDMixin(object):
@@ -495,6 +1141,35 @@ class _SelectLastRowIDMixin(object):
                 self._lastrowid = int(row[0])
 
 
+class DB2Inspector(reflection.Inspector):
+
+    def __init__(self, conn):
+        reflection.Inspector.__init__(self, conn)
+
+    def get_indexes(self, table_name, schema=None, include_primary_key=False):
+        """As Inspector.get_indexes(), including the index enforcing the
+        primary key if `include_primary_key` is true."""
+
+        return self.dialect.get_indexes(self.bind, table_name, schema,
+                                    include_primary_key=include_primary_key,
+                                    info_cache=self.info_cache)
+
+    def get_table_statistics(self, table_name, schema=None):
+        """Return the catalog statistics of `table_name`, a dictionary of
+        ``card``, ``npages``, ``fpages``, ``overflow`` and ``stats_time``,
+        None for those not collected or not available on the server."""
+
+        return self.dialect.get_table_statistics(self.bind, table_name,
+                                    schema, info_cache=self.info_cache)
+
+    def get_approximate_row_count(self, table_name, schema=None):
+        """Return the number of rows of `table_name` according to the
+        catalog statistics, or None if they were never collected."""
+
+        return self.dialect.get_approximate_row_count(self.bind,
+                        table_name, schema, info_cache=self.info_cache)
+
+
 class DB2Dialect(default.DefaultDialect):
 
     name = 'db2'
@@ -510,6 +1185,8 @@ class DB2Dialect(default.DefaultDialect):
     postfetch_lastrowid = True
     supports_sane_rowcount = False
     supports_sane_multi_rowcount = False
+    # primary keys are selected FROM FINAL TABLE (INSERT ...)
+    implicit_returning = True
     supports_native_decimal = True
     preexecute_sequences = False
     supports_alter = True
@@ -520,6 +1197,17 @@ class DB2Dialect(default.DefaultDialect):
 
     supports_default_values = False
     supports_empty_insert = False
+    supports_multivalues_insert = True
+    supports_server_side_cursors = True
+
+    # limits of a dynamic SQL statement, see do_executemany()
+    max_statement_length = 2097152
+    max_bind_parameters = 32767
+
+    # OFFSET n ROWS FETCH NEXT m ROWS ONLY, rather than a ROW_NUMBER()
+    # subquery; set by initialize() according to offset_fetch_version
+    supports_offset_fetch = False
+    offset_fetch_version = (11, 1)
 
     statement_compiler = DB2Compiler
     ddl_compiler = DB2DDLCompiler
@@ -527,9 +1215,18 @@ class DB2Dialect(default.DefaultDialect):
     preparer = DB2IdentifierPreparer
     execution_ctx_cls = DB2ExecutionContext
 
+    inspector = DB2Inspector
+
     _reflector_cls = ibm_reflection.DB2Reflector
 
-    def __init__(self, uppercase_quoted_identifier=False, **kw):
+    def __init__(self, uppercase_quoted_identifier=False,
+                        bulk_reflection=False, reflection_snapshot=None,
+                        catalog_cache_ttl=None, catalog_cache_size=1000,
+                        bulk_has_table=False,
+                        reflection_threads=1,
+                        in_list_bucketing=False, in_list_values_threshold=1024,
+                        insert_chunk_size=None, sequence_prefetch=None,
+                        stream_block_size=1000, **kw):
         super(DB2Dialect, self).__init__(**kw)
 
         self._reflector = self._reflector_cls(self)
@@ -538,12 +1235,80 @@ class DB2Dialect(default.DefaultDialect):
         # be the norm among mainframe DBAs.
         self.uppercase_quoted_identifier = uppercase_quoted_identifier
 
+        # Set to True to fetch columns, keys and indexes of a whole schema
+        # with one catalog query each, the first time any table of that
+        # schema is reflected on a connection.
+        self.bulk_reflection = bulk_reflection
+
+        # Set to True to have has_table() and has_sequence() fetch all the
+        # names of a schema once a connection looks up a second name in
+        # it, keeping them until the connection is checked in.
+        self.bulk_has_table = util.asbool(bulk_has_table)
+
+        # Number of threads, each with its own pooled connection, among
+        # which bulk reflection queries are spread.
+        self.reflection_threads = int(reflection_threads)
+
+        # Path of a file in which reflection results are kept between
+        # processes, see ibm_db_sa.reflection.ReflectionSnapshot.
+        if reflection_snapshot is not None:
+            self._reflector.snapshot = ibm_reflection.ReflectionSnapshot(
+                                                    reflection_snapshot)
+
+        # Number of seconds catalog lookups are shared between all the
+        # connections of this dialect, see invalidate_catalog_cache().
+        if catalog_cache_ttl is not None:
+            self._reflector.catalog_cache = ibm_reflection.CatalogCache(
+                                    catalog_cache_ttl, catalog_cache_size)
+
+        # Set to True to pad IN lists of bound values to power-of-two
+        # sizes, keeping the number of distinct statement texts (and
+        # package cache entries) small. Padded lists longer than
+        # in_list_values_threshold are joined as a VALUES table.
+        self.in_list_bucketing = in_list_bucketing
+        if in_list_values_threshold is not None:
+            in_list_values_threshold = int(in_list_values_threshold)
+        self.in_list_values_threshold = in_list_values_threshold
+
+        # Maximum number of rows of an executemany() INSERT sent as one
+        # multi-row INSERT statement, see do_executemany().
+        if insert_chunk_size is not None:
+            insert_chunk_size = int(insert_chunk_size)
+        self.insert_chunk_size = insert_chunk_size
+
+        # Number of rows fetched at a time from results executed with the
+        # stream_results option, see BlockResultProxy.
+        self.stream_block_size = int(stream_block_size)
+
+        # Number of values of a sequence fetched at once by fire_sequence(),
+        # see SequenceValues.
+        self._sequence_values = None
+        if sequence_prefetch and int(sequence_prefetch) > 1:
+            self._sequence_values = SequenceValues(int(sequence_prefetch))
+
     def normalize_name(self, name):
         return self._reflector.normalize_name(name)
 
     def denormalize_name(self, name):
         return self._reflector.denormalize_name(name)
 
+    def initialize(self, connection):
+        super(DB2Dialect, self).initialize(connection)
+        self.supports_offset_fetch = self.server_version_info is not None \
+                and self.server_version_info >= self.offset_fetch_version
+        if self.bulk_has_table:
+            event.listen(connection.engine.pool, 'checkin',
+                         self._reflector.drop_object_names)
+
+    def _parse_server_version(self, dbms_ver):
+        """Return the DBMS_VER reported by the driver as a tuple of
+        integers, e.g. (11, 1, 405) for "11.01.0405" or (12, 1, 5) for
+        "DSN12015", the product prefixed form of z/OS."""
+        m = re.match(r'(?:[A-Z]{3})?(\d+)\.?(\d\d)\.?(\d+)', dbms_ver.strip())
+        if m is None:
+            return None
+        return tuple(int(x) for x in m.groups())
+
     def _get_default_schema_name(self, connection):
         return self._reflector._get_default_schema_name(connection)
 
@@ -554,6 +1319,87 @@ class DB2Dialect(default.DefaultDialect):
         return self._reflector.has_sequence(connection, sequence_name,
                         schema=schema)
 
+    def has_tables(self, connection, table_names, schema=None):
+        """Return ``{table name: exists}`` for `table_names`, using one
+        catalog query for the whole schema."""
+        return self._reflector.has_tables(connection, table_names,
+                        schema=schema)
+
+    def has_sequences(self, connection, sequence_names, schema=None):
+        """As has_tables(), for sequences."""
+        return self._reflector.has_sequences(connection, sequence_names,
+                        schema=schema)
+
+    def do_commit(self, dbapi_connection):
+        self._reflector.transaction_ended(dbapi_connection)
+        super(DB2Dialect, self).do_commit(dbapi_connection)
+
+    def do_rollback(self, dbapi_connection):
+        self._reflector.transaction_ended(dbapi_connection)
+        super(DB2Dialect, self).do_rollback(dbapi_connection)
+
+    def do_execute(self, cursor, statement, parameters, context=None):
+        super(DB2Dialect, self).do_execute(cursor, statement, parameters,
+                                            context)
+        if context is None:
+            return
+        if context.isddl:
+            ddl = context.compiled.statement
+        elif not isinstance(context.compiled, compiler.DDLCompiler) and \
+                DDL_RE.match(statement):
+            # DDL given as text
+            ddl = None
+        else:
+            return
+        self._reflector.catalog_changed(context.root_connection, ddl)
+        # a sequence may have been dropped, or restarted by an ALTER
+        if self._sequence_values is not None and \
+                not isinstance(ddl, (sa_schema.CreateTable,
+                                     sa_schema.CreateSequence)):
+            self._sequence_values.clear()
+
+    def do_executemany(self, cursor, statement, parameters, context=None):
+        """Insert the rows of an executemany() INSERT with multi-row
+        INSERT statements of up to ``insert_chunk_size`` rows, within the
+        statement length and parameter markers limits of DB2."""
+        row = getattr(context and context.compiled, 'values_row', None)
+        if row is None or not self.insert_chunk_size or \
+                not self.supports_multivalues_insert or \
+                not self.positional or len(parameters) < 2:
+            self._executemany(cursor, statement, parameters, context)
+            return
+        if not isinstance(statement, unicode):
+            row = row.encode(self.encoding)
+        if not statement.endswith(row):
+            self._executemany(cursor, statement, parameters, context)
+            return
+        head = statement[:-len(row)]
+
+        size = min(self.insert_chunk_size,
+                   self.max_bind_parameters // max(len(parameters[0]), 1),
+                   (self.max_statement_length - len(head)) // (len(row) + 2))
+        size = max(size, 1)
+        rowcount = 0
+        for start in xrange(0, len(parameters), size):
+            chunk = parameters[start:start + size]
+            flattened = []
+            for params in chunk:
+                flattened.extend(params)
+            cursor.execute(head + ", ".join([row] * len(chunk)),
+                           tuple(flattened))
+            rowcount += cursor.rowcount
+        if context is not None:
+            context._rowcount = rowcount
+
+    def _executemany(self, cursor, statement, parameters, context=None):
+        """Execute ``statement`` once for each of ``parameters``."""
+        super(DB2Dialect, self).do_executemany(cursor, statement,
+                                               parameters, context)
+
+    def _sequence_values_sql(self, sequence_name, size):
+        return "SELECT NEXT VALUE FOR %s FROM (VALUES %s) AS db2_seq (n)" % (
+                    sequence_name, ", ".join([str(n) for n in range(size)]))
+
     def get_schema_names(self, connection, **kw):
         return self._reflector.get_schema_names(connection, **kw)
 
@@ -584,16 +1430,76 @@ class DB2Dialect(default.DefaultDialect):
         return self._reflector.get_indexes(
                                 connection, table_name, schema=schema, **kw)
 
+    def get_table_statistics(self, connection, table_name, schema=None,
+                                **kw):
+        return self._reflector.get_table_statistics(
+                                connection, table_name, schema=schema, **kw)
+
+    def get_approximate_row_count(self, connection, table_name, schema=None,
+                                **kw):
+        return self.get_table_statistics(
+                            connection, table_name, schema=schema, **kw)['card']
+
+    def prefetch_reflection(self, connection, schema=None, table_names=None):
+        return self._reflector.prefetch(connection, schema=schema,
+                                table_names=table_names)
+
+    def iter_schema_names(self, connection, pattern=None, page_size=1000):
+        """Generate the schema names one page of ``page_size`` at a time,
+        optionally restricted to those LIKE ``pattern``."""
+        return self._reflector.iter_schema_names(connection,
+                                pattern=pattern, page_size=page_size)
+
+    def iter_table_names(self, connection, schema=None, pattern=None,
+                                page_size=1000):
+        """Generate the table names of ``schema`` one page of
+        ``page_size`` at a time, optionally restricted to those LIKE
+        ``pattern``."""
+        return self._reflector.iter_table_names(connection, schema=schema,
+                                pattern=pattern, page_size=page_size)
+
+    def iter_view_names(self, connection, schema=None, pattern=None,
+                                page_size=1000):
+        """As iter_table_names(), for views."""
+        return self._reflector.iter_view_names(connection, schema=schema,
+                                pattern=pattern, page_size=page_size)
+
+    def invalidate_catalog_cache(self, table_name=None, schema=None):
+        return self._reflector.invalidate(table_name=table_name, schema=schema)
+
+    def name_cache_stats(self):
+        """Return the hit/miss counters of the identifier normalization
+        caches."""
+        return {
+            'normalize': self._reflector.normalized_names.stats(),
+            'denormalize': self._reflector.denormalized_names.stats(),
+        }
+
 
 class AS400Dialect(DB2Dialect):
     flavor = 'as400'
 
+    offset_fetch_version = (7, 2)
+
+    implicit_returning = False
+
     _reflector_cls = ibm_reflection.AS400Reflector
 
 
 class ZOSDialect(DB2Dialect):
     flavor = 'zos'
 
+    offset_fetch_version = (12,)
+
+    # DB2 for z/OS inserts many rows with FOR n ROWS, not with VALUES
+    supports_multivalues_insert = False
+
+    def _sequence_values_sql(self, sequence_name, size):
+        # no VALUES in a FROM clause
+        return "WITH db2_seq (n) AS (SELECT 1 FROM SYSIBM.SYSDUMMY1 " \
+               "UNION ALL SELECT n + 1 FROM db2_seq WHERE n < %d) " \
+               "SELECT NEXT VALUE FOR %s FROM db2_seq" % (size, sequence_name)
+
     _reflector_cls = ibm_reflection.ZOSReflector
 
     def __init__(self, label_length=30, **kwargs):
@@ -18,9 +18,12 @@
 # | Version: 0.3.x                                                           |
 # +--------------------------------------------------------------------------+
 
+import datetime
+import decimal
+
 from .base import DB2ExecutionContext, DB2Dialect, AS400Dialect, ZOSDialect
 
-from sqlalchemy import processors, types as sa_types, util
+from sqlalchemy import event, processors, types as sa_types, util
 
 class _IBM_Numeric_ibm_db(sa_types.Numeric):
     def result_processor(self, dialect, coltype):
@@ -30,11 +33,318 @@ class _IBM_Numeric_ibm_db(sa_types.Numeric):
             return processors.to_float
 
 
+class StatementCache(object):
+    """Statements prepared on an ibm_db connection, kept by SQL text for
+    reuse, the least recently used ones being freed once there are more
+    than ``size``.
+
+    A statement is taken out of the cache while a cursor executes it, so
+    that two open results never share a statement handle; a statement
+    already in use is prepared again.  The hit, miss and eviction counters
+    are those of the whole dialect, see
+    DB2Dialect_ibm_db.statement_cache_stats().
+    """
+
+    def __init__(self, ibm_db, size, stats):
+        self.ibm_db = ibm_db
+        self.size = size
+        self.stats = stats
+        self._statements = util.OrderedDict()
+        self._in_use = []
+
+    def checkout(self, conn_handler, sql):
+        """Return a [statement, description, sql] entry for ``sql``, the
+        description being None until the statement is first described."""
+        try:
+            entry = self._statements.pop(sql)
+        except KeyError:
+            self.stats['misses'] += 1
+            entry = [self.ibm_db.prepare(conn_handler, sql), None, sql]
+        else:
+            self.stats['hits'] += 1
+        self._in_use.append(entry)
+        return entry
+
+    def checkin(self, entry):
+        """Return ``entry``, its result closed, to the cache."""
+        in_use = [e for e in self._in_use if e is not entry]
+        if len(in_use) == len(self._in_use):
+            # already returned by close_results()
+            return
+        self._in_use = in_use
+        self.ibm_db.free_result(entry[0])
+        self._put(entry)
+
+    def close_results(self):
+        """Close the results still open on statements of the cache, and
+        return these to the cache."""
+        in_use, self._in_use = self._in_use, []
+        for entry in in_use:
+            self.ibm_db.free_result(entry[0])
+            self._put(entry)
+
+    def _put(self, entry):
+        if entry[2] in self._statements:
+            self._free(entry)
+            return
+        self._statements[entry[2]] = entry
+        while len(self._statements) > self.size:
+            self._free(self._statements.pop(self._statements.keys()[0]))
+            self.stats['evictions'] += 1
+
+    def _free(self, entry):
+        try:
+            self.ibm_db.free_stmt(entry[0])
+        except Exception:
+            pass
+
+
+class FetchCursor(object):
+    """Fetching of rows straight from an ibm_db statement handle, in
+    batches, converting the values ibm_db returns as strings."""
+
+    arraysize = 1
+
+    _type_converters = {
+        'decimal': decimal.Decimal,
+        'decfloat': decimal.Decimal,
+        'bigint': long,
+    }
+
+    def _column_converters(self, type_codes):
+        return tuple([(i, self._type_converters[type_code])
+                      for i, type_code in enumerate(type_codes)
+                      if type_code in self._type_converters])
+
+    def _rows(self, rows):
+        converters = self._converters
+        if not converters:
+            return rows
+        converted = []
+        for row in rows:
+            row = list(row)
+            for i, converter in converters:
+                if row[i] is not None:
+                    row[i] = converter(row[i])
+            converted.append(tuple(row))
+        return converted
+
+    def _fetch(self, size):
+        stmt = self._statement()
+        fetch_tuple = self.ibm_db.fetch_tuple
+        rows = []
+        append = rows.append
+        try:
+            while size is None or len(rows) < size:
+                row = fetch_tuple(stmt)
+                if not row:
+                    break
+                append(row)
+        except Exception, e:
+            raise self.dialect.dbapi._get_exception(e)
+        return self._rows(rows)
+
+    def fetchone(self):
+        rows = self._fetch(1)
+        if not rows:
+            return None
+        return rows[0]
+
+    def fetchmany(self, size=None):
+        if size is None:
+            size = self.arraysize
+        return self._fetch(size)
+
+    def fetchall(self):
+        return self._fetch(None)
+
+
+# parameter values ibm_db_dbi passes to ibm_db as strings; None and
+# Decimal values are bound by ibm_db itself
+_STR_PARAMETER_TYPES = (datetime.datetime, datetime.date, datetime.time,
+                        buffer)
+
+def _convert_parameters(parameters):
+    """Return ``parameters`` as a tuple of the values ibm_db_dbi would
+    bind with ibm_db."""
+    converted = []
+    for value in parameters:
+        if isinstance(value, _STR_PARAMETER_TYPES):
+            value = str(value)
+        converted.append(value)
+    return tuple(converted)
+
+
+class StatementCursor(FetchCursor):
+    """DBAPI cursor executing statements prepared in the StatementCache
+    of its connection, straight through ibm_db.
+
+    Parameters are converted and results described as an ibm_db_dbi
+    cursor does.
+    """
+
+    # the DBAPITypeObjects of ibm_db_dbi, in the order it matches ibm_db
+    # type names against them
+    _type_objects = ('STRING', 'TEXT', 'XML', 'BINARY', 'NUMBER', 'BIGINT',
+                     'FLOAT', 'DECIMAL', 'DATE', 'TIME', 'DATETIME', 'ROWID')
+
+    def __init__(self, dialect, conn_handler, statements):
+        self.dialect = dialect
+        self.ibm_db = dialect.dbapi.ibm_db
+        self.conn_handler = conn_handler
+        self.statements = statements
+        self.description = None
+        self.rowcount = -1
+        self._entry = None
+        self._converters = ()
+
+    def execute(self, operation, parameters=()):
+        self._release()
+        ibm_db = self.ibm_db
+        try:
+            entry = self._entry = self.statements.checkout(
+                                            self.conn_handler, operation)
+            ibm_db.execute(entry[0], _convert_parameters(parameters))
+            if entry[1] is None:
+                entry[1] = self._describe(entry[0])
+            self.rowcount = ibm_db.num_rows(entry[0])
+        except self.dialect.dbapi.Error:
+            raise
+        except Exception, e:
+            raise self.dialect.dbapi._get_exception(e)
+        self.description, self._converters = entry[1]
+
+    def executemany(self, operation, seq_of_parameters):
+        rowcount = 0
+        for parameters in seq_of_parameters:
+            self.execute(operation, parameters)
+            rowcount += self.rowcount
+        self.rowcount = rowcount
+
+    def _type_code(self, type_name):
+        """Return the ibm_db_dbi type object matching ibm_db's
+        ``type_name``, or None as ibm_db_dbi would."""
+        type_name = type_name.upper()
+        for name in self._type_objects:
+            type_object = getattr(self.dialect.dbapi, name, None)
+            if type_object is not None and type_object == type_name:
+                return type_object
+        return None
+
+    def _describe(self, stmt):
+        """Return the DBAPI description of the result of ``stmt`` and the
+        conversion of its values which ibm_db returns as strings."""
+        ibm_db = self.ibm_db
+        columns = ibm_db.num_fields(stmt)
+        if not columns:
+            return None, ()
+        description = []
+        type_names = []
+        for i in range(columns):
+            type_names.append(ibm_db.field_type(stmt, i))
+            display_size = ibm_db.field_display_size(stmt, i)
+            description.append((ibm_db.field_name(stmt, i),
+                                self._type_code(type_names[-1]),
+                                display_size, display_size,
+                                ibm_db.field_precision(stmt, i),
+                                ibm_db.field_scale(stmt, i),
+                                ibm_db.field_nullable(stmt, i)))
+        return description, self._column_converters(type_names)
+
+    def _statement(self):
+        if self._entry is None or self.description is None:
+            raise self.dialect.dbapi.ProgrammingError("No result set")
+        return self._entry[0]
+
+    @property
+    def last_identity_val(self):
+        stmt = self.ibm_db.exec_immediate(self.conn_handler,
+                    "SELECT IDENTITY_VAL_LOCAL() FROM SYSIBM.SYSDUMMY1")
+        try:
+            value = self.ibm_db.fetch_tuple(stmt)[0]
+        finally:
+            self.ibm_db.free_stmt(stmt)
+        if value is not None:
+            value = int(value)
+        return value
+
+    def _release(self):
+        if self._entry is not None:
+            entry, self._entry = self._entry, None
+            self.statements.checkin(entry)
+        self.description = None
+
+    def close(self):
+        self._release()
+
+
+class FastFetchCursor(FetchCursor):
+    """ibm_db_dbi cursor whose rows are fetched straight from its ibm_db
+    statement handle rather than through ibm_db_dbi's fetch methods; all
+    else is left to the ibm_db_dbi cursor."""
+
+    def __init__(self, dialect, cursor):
+        self.dialect = dialect
+        self.ibm_db = dialect.dbapi.ibm_db
+        self.cursor = cursor
+        self._converters = None
+
+    def __getattr__(self, key):
+        return getattr(self.cursor, key)
+
+    def execute(self, operation, parameters=()):
+        self._converters = None
+        return self.cursor.execute(operation, parameters)
+
+    def executemany(self, operation, seq_of_parameters):
+        self._converters = None
+        return self.cursor.executemany(operation, seq_of_parameters)
+
+    def _statement(self):
+        if self.cursor.description is None:
+            raise self.dialect.dbapi.ProgrammingError("No result set")
+        stmt = self.cursor.stmt_handler
+        if self._converters is None:
+            ibm_db = self.ibm_db
+            self._converters = self._column_converters(
+                    [ibm_db.field_type(stmt, i)
+                     for i in range(ibm_db.num_fields(stmt))])
+        return stmt
+
+
 class DB2ExecutionContext_ibm_db(DB2ExecutionContext):
 
+    def create_dbapi_cursor(self):
+        if not self.dialect.statement_cache_size:
+            cursor = DB2ExecutionContext.create_dbapi_cursor(self)
+            if self.dialect.fast_fetch:
+                cursor = FastFetchCursor(self.dialect, cursor)
+            return cursor
+        info = self.root_connection.connection.info
+        statements = info.get('ibm_db_sa_statements')
+        if statements is None:
+            statements = info['ibm_db_sa_statements'] = StatementCache(
+                    self.dialect.dbapi.ibm_db,
+                    self.dialect.statement_cache_size,
+                    self.dialect._statement_cache_stats)
+        return StatementCursor(self.dialect,
+                               self._dbapi_connection.conn_handler,
+                               statements)
+
     def get_lastrowid(self):
         return self.cursor.last_identity_val
 
+
+def _homogeneous(parameters):
+    """Return True if the values of each parameter have one type in all
+    the sets of ``parameters``."""
+    types = [type(value) for value in parameters[0]]
+    for params in parameters:
+        if [type(value) for value in params] != types:
+            return False
+    return True
+
+
 class DB2Dialect_ibm_db(DB2Dialect):
 
     driver = 'ibm_db'
@@ -48,6 +358,26 @@ class DB2Dialect_ibm_db(DB2Dialect):
         }
     )
 
+    def __init__(self, executemany_chunk_size=None, statement_cache_size=0,
+                        fast_fetch=False, **kw):
+        super(DB2Dialect_ibm_db, self).__init__(**kw)
+
+        # Fetch rows straight through ibm_db, see FastFetchCursor; cursors
+        # of the statement cache always do.
+        self.fast_fetch = util.asbool(fast_fetch)
+
+        # Number of prepared statements kept per connection, see
+        # StatementCache and statement_cache_stats().
+        self.statement_cache_size = int(statement_cache_size or 0)
+        self._statement_cache_stats = {'hits': 0, 'misses': 0,
+                                       'evictions': 0}
+
+        # Number of parameter sets bound as arrays and sent at once by
+        # executemany(), see _executemany(); None to send them one by one.
+        self.executemany_chunk_size = int(executemany_chunk_size or 0)
+        if self._execute_many is not None:
+            self.supports_sane_multi_rowcount = True
+
     @classmethod
     def dbapi(cls):
         """ Returns: the underlying DBAPI driver module
@@ -55,8 +385,86 @@ class DB2Dialect_ibm_db(DB2Dialect):
         import ibm_db_dbi as module
         return module
 
+    def initialize(self, connection):
+        super(DB2Dialect_ibm_db, self).initialize(connection)
+        if self.statement_cache_size:
+            pool = connection.engine.pool
+            event.listen(pool, 'reset', self._close_statement_results)
+            event.listen(pool, 'checkin', self._close_statement_results)
+
+    def _close_statement_results(self, dbapi_connection, connection_record):
+        """Close the results left open on the cached statements of a
+        connection going back to the pool; the statements stay prepared."""
+        if connection_record is None:
+            return
+        statements = connection_record.info.get('ibm_db_sa_statements')
+        if statements is not None:
+            statements.close_results()
+
+    def statement_cache_stats(self):
+        """Return the hit/miss/eviction counters of the prepared statement
+        caches of all connections, or None if they aren't enabled."""
+        if not self.statement_cache_size:
+            return None
+        stats = dict(self._statement_cache_stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = lookups and float(stats['hits']) / lookups or 0.0
+        return stats
+
+    @property
+    def _execute_many(self):
+        """ibm_db.execute_many(), if available and enabled."""
+        if not self.executemany_chunk_size or self.dbapi is None:
+            return None
+        return getattr(getattr(self.dbapi, 'ibm_db', None),
+                       'execute_many', None)
+
+    def _executemany(self, cursor, statement, parameters, context=None):
+        """Execute ``statement`` with arrays of up to
+        ``executemany_chunk_size`` sets of parameters, rather than with
+        ibm_db_dbi's round trip per set."""
+        execute_many = self._execute_many
+        if execute_many is not None:
+            parameters = [_convert_parameters(params)
+                          for params in parameters]
+        # ibm_db.execute_many() binds each column with the type of its
+        # value in the first row, and rejects rows with other types, such
+        # as None or a Decimal among ints
+        if execute_many is None or not _homogeneous(parameters):
+            super(DB2Dialect_ibm_db, self)._executemany(
+                                cursor, statement, parameters, context)
+            return
+
+        ibm_db = self.dbapi.ibm_db
+        stmt = None
+        rowcount = 0
+        try:
+            try:
+                stmt = ibm_db.prepare(cursor.conn_handler, statement)
+                size = self.executemany_chunk_size
+                for start in xrange(0, len(parameters), size):
+                    count = execute_many(stmt,
+                            tuple(parameters[start:start + size]))
+                    if count is None:
+                        raise self.dbapi.DatabaseError(
+                                            ibm_db.stmt_errormsg(stmt))
+                    rowcount += count
+            except self.dbapi.Error:
+                raise
+            except Exception, e:
+                # ibm_db raises plain exceptions, which ibm_db_dbi maps
+                # to DBAPI ones from their SQLSTATE
+                raise self.dbapi._get_exception(e)
+        finally:
+            if stmt:
+                ibm_db.free_stmt(stmt)
+        if context is not None:
+            context._rowcount = rowcount
+
     def _get_server_version_info(self, connection):
-        return connection.connection.server_info()
+        # server_info() is (DBMS_NAME, DBMS_VER)
+        return self._parse_server_version(
+                                connection.connection.server_info()[1])
 
     def create_connect_args(self, url):
         # DSN support through CLI configuration (../cfg/db2cli.ini),
@@ -33,6 +33,10 @@ class DB2Dialect_pyodbc(PyODBCConnector, DB2Dialect):
 
     pyodbc_driver_name = "IBM DB2 ODBC DRIVER"
 
+    def _get_server_version_info(self, connection):
+        return self._parse_server_version(connection.connection.getinfo(
+                                            self.dbapi.SQL_DBMS_VER))
+
     def create_connect_args(self, url):
         opts = url.translate_connect_args(username='user')
         opts.update(url.query)
@@ -19,12 +19,22 @@
 # +--------------------------------------------------------------------------+
 
 from sqlalchemy import types as sa_types
-from sqlalchemy import sql, util
-from sqlalchemy import Table, MetaData, Column
-from sqlalchemy.engine import reflection
+from sqlalchemy import exc, sql, util
+from sqlalchemy.util import pickle
+from sqlalchemy import Table, MetaData, Column, Sequence
+from sqlalchemy.schema import CreateTable, DropTable, CreateSequence, \
+    DropSequence
+from sqlalchemy.engine import reflection, Connection
+from sqlalchemy import pool
+import copy
 import itertools
+import os
+import Queue
 import re
-
+import sys
+import threading
+import time
+import weakref
 
 
 class CoerceUnicode(sa_types.TypeDecorator):
@@ -35,34 +45,317 @@ class CoerceUnicode(sa_types.TypeDecorator):
             value = value.decode(dialect.encoding)
         return value
 
+def _schema_param():
+    return sql.bindparam('schema', type_=CoerceUnicode)
+
+def _table_name_param():
+    return sql.bindparam('table_name', type_=CoerceUnicode)
+
+def _collected(value):
+    """Return the catalog statistic ``value``, or None if it was never
+    collected, which the catalog reports as -1."""
+    if value is not None and value < 0:
+        return None
+    return value
+
+class ReflectionSnapshot(object):
+    """Reflection results kept in a local file, so that they can be shared
+    between processes and across restarts.
+
+    Entries are stored per database, schema and table along with the time
+    the table was last altered according to the catalog; an entry is only used while
+    that time is unchanged.  DDL which the catalog does not record as an
+    alteration of the table itself (e.g. ``CREATE INDEX``) is not detected,
+    call :meth:`clear` after such changes.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                f = open(self.path, 'rb')
+            except IOError:
+                self._entries = {}
+            else:
+                try:
+                    try:
+                        self._entries = pickle.load(f)
+                    except Exception:
+                        # truncated, or written by an incompatible version
+                        util.warn("Ignoring unreadable reflection snapshot "
+                                    "'%s'" % self.path)
+                        self._entries = {}
+                finally:
+                    f.close()
+        return self._entries
+
+    def _save(self):
+        tmp_path = '%s.%d.tmp' % (self.path, os.getpid())
+        f = open(tmp_path, 'wb')
+        try:
+            pickle.dump(self._entries, f, pickle.HIGHEST_PROTOCOL)
+        finally:
+            f.close()
+        try:
+            os.rename(tmp_path, self.path)
+        except OSError:
+            # Windows won't rename over an existing file
+            os.remove(self.path)
+            os.rename(tmp_path, self.path)
+
+    def get_schema(self, key):
+        """Return ``{table: (alter_time, {kind: result})}`` for a schema."""
+        self._lock.acquire()
+        try:
+            return dict(self._load().get(key, ()))
+        finally:
+            self._lock.release()
+
+    def set_schema(self, key, tables):
+        self._lock.acquire()
+        try:
+            self._load()[key] = tables
+            self._save()
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        self._lock.acquire()
+        try:
+            self._entries = {}
+            self._save()
+        finally:
+            self._lock.release()
+
+
+class CatalogCache(object):
+    """Catalog lookups shared by all the connections of a dialect.
+
+    Entries expire ``ttl`` seconds after they were fetched, and the least
+    recently used ones are discarded once there are more than ``size``.
+    Call :meth:`invalidate` after DDL to drop results which have become
+    stale.
+
+    """
+
+    def __init__(self, ttl, size=1000):
+        self.ttl = ttl
+        self._entries = util.LRUCache(size)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        self._lock.acquire()
+        try:
+            try:
+                fetched, value = self._entries[key]
+            except KeyError:
+                return default
+            if time.time() - fetched > self.ttl:
+                del self._entries[key]
+                return default
+            return value
+        finally:
+            self._lock.release()
+
+    def set(self, key, value):
+        self._lock.acquire()
+        try:
+            self._entries[key] = (time.time(), value)
+        finally:
+            self._lock.release()
+
+    def invalidate(self, match=None):
+        """Drop the entries for which ``match(key)`` is true, or all of
+        them if ``match`` is None."""
+        self._lock.acquire()
+        try:
+            if match is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries.keys() if match(k)]:
+                    del self._entries[key]
+        finally:
+            self._lock.release()
+
+
+_name_miss = object()
+
+class NameCache(object):
+    """Bounded memo of an identifier conversion, counting hits and misses.
+
+    Lookups don't lock, as a plain dictionary read is atomic; once ``size``
+    names are held the memo starts over.  The hit counter isn't locked
+    either, so under concurrency it is approximate.
+    """
+
+    def __init__(self, convert, size=10000):
+        self.convert = convert
+        self.size = size
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def __call__(self, *key):
+        value = self._entries.get(key, _name_miss)
+        if value is not _name_miss:
+            self.hits += 1
+            return value
+        value = self.convert(*key)
+        self._lock.acquire()
+        try:
+            self.misses += 1
+            if len(self._entries) >= self.size:
+                self._entries.clear()
+            self._entries[key] = value
+        finally:
+            self._lock.release()
+        return value
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+            'hit_rate': lookups and float(self.hits) / lookups or 0.0,
+        }
+
+_catalog_miss = object()
+
+@util.decorator
+def catalog_cache(fn, self, connection, *args, **kw):
+    """Serve a reflector method from the dialect-wide catalog cache.
+
+    Keys are ``(method name, schema, object name, other arguments)``, the
+    object name being the first positional argument, if any.  Each caller
+    gets its own copy of the result, which it may modify.
+    """
+    cache = self.catalog_cache
+    if cache is None:
+        return fn(self, connection, *args, **kw)
+    key = (
+            fn.__name__,
+            kw.get('schema'),
+            args and args[0] or None,
+            tuple((k, v) for k, v in sorted(kw.iteritems())
+                    if k != 'schema' and isinstance(v, (basestring, int, float)))
+        )
+    ret = cache.get(key, _catalog_miss)
+    if ret is _catalog_miss:
+        ret = fn(self, connection, *args, **kw)
+        cache.set(key, ret)
+    return copy.deepcopy(ret)
+
+
 class BaseReflector(object):
+    # kinds of per-table information which can be fetched for a whole
+    # schema at once, see prefetch()
+    bulk_kinds = ('columns', 'primary_keys', 'foreign_keys', 'indexes')
+
     def __init__(self, dialect):
         self.dialect = dialect
         self.ischema_names = dialect.ischema_names
         self.identifier_preparer = dialect.identifier_preparer
+        self._bulk_results = weakref.WeakKeyDictionary()
+        self._compiled_queries = {}
+        # guards the structures above, which are shared by the threads of
+        # a parallel prefetch and by all the connections of the dialect
+        self._lock = threading.RLock()
+        self.snapshot = None
+        self._database = None
+        self.catalog_cache = None
+        self.normalized_names = NameCache(self._normalize_name)
+        self.denormalized_names = NameCache(self._denormalize_name)
+        self.type_constructors = self._type_constructors()
+        self._column_types = {}
+        self._unknown_types = set()
+
+    # precision of DECFLOAT columns by catalog length, which is in bytes
+    decfloat_precisions = {8: 16, 16: 34}
+
+    def _type_constructors(self):
+        """Return ``{catalog type name: constructor(length, scale)}``."""
+        def plain(coltype):
+            return lambda length, scale: coltype
+        def sized(coltype):
+            return lambda length, scale: coltype(int(length))
+        def decimal(coltype):
+            return lambda length, scale: coltype(int(length), int(scale))
+        def decfloat(coltype):
+            return lambda length, scale: coltype(
+                            self.decfloat_precisions.get(int(length)))
+
+        constructors = dict((name, plain(coltype))
+                            for name, coltype in self.ischema_names.items())
+        for name in ('DECIMAL', 'NUMERIC'):
+            constructors[name] = decimal(self.ischema_names[name])
+        for name in ('CHARACTER', 'CHAR', 'VARCHAR', 'GRAPHIC', 'VARGRAPHIC',
+                        'BINARY', 'VARBINARY', 'VARBIN'):
+            constructors[name] = sized(self.ischema_names[name])
+        constructors['DECFLOAT'] = decfloat(self.ischema_names['DECFLOAT'])
+        return constructors
+
+    def _column_type(self, typename, length, scale, column_name):
+        """Return the type of a column from its catalog type name, length
+        and scale.
+
+        Types are shared by the columns with the same definition; an
+        unknown type name is warned about once, and reflected as NULLTYPE.
+        """
+        key = (typename, length, scale)
+        coltype = self._column_types.get(key)
+        if coltype is None:
+            name = typename.strip().upper()
+            try:
+                construct = self.type_constructors[name]
+            except KeyError:
+                if name not in self._unknown_types:
+                    self._unknown_types.add(name)
+                    util.warn("Did not recognize type '%s' of column '%s'" %
+                                (name, column_name))
+                coltype = sa_types.NULLTYPE
+            else:
+                coltype = construct(length, scale)
+            self._column_types[key] = coltype
+        return coltype
 
     def normalize_name(self, name):
         if name is None:
             return None
+        return self.normalized_names(
+                    name, self.dialect.uppercase_quoted_identifier)
+
+    def denormalize_name(self, name):
+        if name is None:
+            return None
+        return self.denormalized_names(
+                    name, self.dialect.uppercase_quoted_identifier,
+                    self.dialect.supports_unicode_binds)
+
+    def _normalize_name(self, name, uppercase_quoted_identifier):
         if isinstance(name, str):
             name = name.decode(self.dialect.encoding)
         if name.upper() == name and (
-            self.dialect.uppercase_quoted_identifier
+            uppercase_quoted_identifier
             or not self.identifier_preparer._requires_quotes(name.lower())
         ):
             return name.lower()
         else:
             return name
 
-    def denormalize_name(self, name):
-        if name is None:
-            return None
+    def _denormalize_name(self, name, uppercase_quoted_identifier,
+                                supports_unicode_binds):
         if name.lower() == name and (
-            self.dialect.uppercase_quoted_identifier
+            uppercase_quoted_identifier
             or not self.identifier_preparer._requires_quotes(name.lower())
         ):
             name = name.upper()
-        if not self.dialect.supports_unicode_binds:
+        if not supports_unicode_binds:
             name = name.encode(self.dialect.encoding)
         else:
             name = unicode(name)
@@ -80,6 +373,529 @@ class BaseReflector(object):
     def default_schema_name(self):
         return self.dialect.default_schema_name
 
+    def invalidate(self, table_name=None, schema=None):
+        """Forget cached catalog information about ``table_name``, or about
+        all of ``schema``, or everything if neither is given.
+
+        Per-table results and the object name lists of the schema are
+        dropped from the catalog cache, and the schema-wide results kept
+        for open connections are discarded.
+        """
+        self._bulk_results.clear()
+        self._invalidate_catalog_cache(table_name, schema)
+
+    def _invalidate_catalog_cache(self, table_name=None, schema=None):
+        if self.catalog_cache is None:
+            return
+        if table_name is None and schema is None:
+            self.catalog_cache.invalidate()
+            return
+
+        target_schema = self._table_key(schema or self.default_schema_name)
+        if table_name is not None:
+            table_name = self._table_key(table_name)
+
+        def match(key):
+            fn_name, key_schema, name = key[0:3]
+            if key_schema is None and fn_name == 'get_schema_names':
+                return table_name is None
+            if self._table_key(key_schema or self.default_schema_name) \
+                    != target_schema:
+                return False
+            return table_name is None or name is None or \
+                        self._table_key(name) == table_name
+        self.catalog_cache.invalidate(match)
+
+    def _execute_catalog(self, connection, build, schema, table_names):
+        """Execute the catalog query returned by ``build(table_filter)`` for
+        ``schema``, restricted to ``table_names`` unless that is None.
+
+        The queries for a whole schema or for a single table are compiled
+        once per dialect, with the schema and table name as bind
+        parameters, so that both the compilation and the server's access
+        plan are reused.
+        """
+        params = {'schema': self.denormalize_name(
+                                    schema or self.default_schema_name)}
+        if table_names is not None and len(table_names) > 1:
+            names = [self.denormalize_name(name) for name in table_names]
+            return connection.execute(
+                        build(lambda column: [column.in_(names)]), params)
+
+        if table_names is None:
+            key = (build.__name__, 'schema')
+            table_filter = lambda column: []
+        else:
+            key = (build.__name__, 'table')
+            params['table_name'] = self.denormalize_name(table_names[0])
+            table_filter = lambda column: [column == _table_name_param()]
+        compiled = self._compiled_queries.get(key)
+        if compiled is None:
+            self._lock.acquire()
+            try:
+                compiled = self._compiled_queries.get(key)
+                if compiled is None:
+                    compiled = self._compiled_queries[key] = \
+                        build(table_filter).compile(dialect=self.dialect)
+            finally:
+                self._lock.release()
+        return connection.execute(compiled, params)
+
+    def _name_pattern(self, pattern):
+        """Denormalize a LIKE pattern as a name would be: an all lowercase
+        pattern matches the case insensitive names."""
+        if pattern.lower() == pattern:
+            pattern = pattern.upper()
+        if not self.dialect.supports_unicode_binds:
+            pattern = pattern.encode(self.dialect.encoding)
+        else:
+            pattern = unicode(pattern)
+        return pattern
+
+    def _iter_names(self, connection, column, criteria, pattern=None,
+                            page_size=1000, distinct=False):
+        """Generate the normalized values of ``column`` where ``criteria``
+        hold, in order, reading ``page_size`` rows at a time.
+
+        Each page starts after the last name of the previous one, so the
+        server only ever sorts and returns one page, and no cursor is left
+        open between pages.
+        """
+        criteria = list(criteria)
+        if pattern is not None:
+            criteria.append(column.like(self._name_pattern(pattern)))
+        criteria.append(column > sql.bindparam('last_name',
+                                                type_=CoerceUnicode))
+        query = sql.select([column], sql.and_(*criteria),
+                            order_by=[column], distinct=distinct).\
+                    limit(page_size)
+        compiled = query.compile(dialect=self.dialect)
+        last_name = u''
+        while True:
+            rows = connection.execute(compiled,
+                                        {'last_name': last_name}).fetchall()
+            for row in rows:
+                yield self.normalize_name(row[0])
+            if len(rows) < page_size:
+                break
+            last_name = rows[-1][0]
+
+    # column_sorting of the catalogs' column ordering codes, any other code
+    # marking an INCLUDE column
+    index_column_sorting = {'A': (), 'D': ('desc',), 'R': ('random',)}
+
+    def _index(self, name, unique, columns, primary_key=False,
+                    clustered=False, full_key_cardinality=None,
+                    cluster_ratio=None):
+        """Return the get_indexes() entry of an index on ``columns``, a
+        sequence of (column name, ordering code) pairs.
+
+        Besides the usual keys, ``column_sorting`` maps the columns which
+        aren't in ascending order to ``('desc',)`` or ``('random',)``,
+        ``include_columns`` lists the INCLUDE columns, and
+        ``full_key_cardinality`` and ``cluster_ratio`` (between 0 and 1)
+        are None unless statistics were collected.
+        """
+        index = {
+            'name': self.normalize_name(name),
+            'column_names': [],
+            'column_sorting': {},
+            'include_columns': [],
+            'unique': unique,
+            'primary_key': primary_key,
+            'clustered': clustered,
+            'full_key_cardinality': _collected(full_key_cardinality),
+            'cluster_ratio': _collected(cluster_ratio),
+        }
+        for colname, ordering in columns:
+            colname = self.normalize_name(colname)
+            sorting = self.index_column_sorting.get((ordering or '').strip())
+            if sorting is None:
+                index['include_columns'].append(colname)
+            else:
+                index['column_names'].append(colname)
+                if sorting:
+                    index['column_sorting'][colname] = sorting
+        return index
+
+    def _table_statistics(self, table_name, row):
+        """Return the statistics of ``row``, (card, npages, fpages,
+        overflow, stats_time), as a dictionary.
+
+        The catalog reports statistics which were never collected as -1;
+        these become None.
+        """
+        if row is None:
+            raise exc.NoSuchTableError(table_name)
+        stats = dict(zip(
+                    ('card', 'npages', 'fpages', 'overflow', 'stats_time'),
+                    row))
+        for key, value in stats.items():
+            if isinstance(value, (int, long, float)):
+                stats[key] = _collected(value)
+        return stats
+
+    def _table_key(self, table_name):
+        return self.normalize_name(self.denormalize_name(table_name))
+
+    def _bulk_store(self, connection, info_cache):
+        """Return the dictionary holding schema-wide results for this
+        connection, or None if there is nowhere to keep them.
+
+        Results are kept for the DBAPI connection checked out by the
+        :class:`.Connection`, until it commits, rolls back or goes back to
+        the pool, so that all the tables loaded by one ``MetaData.reflect()``
+        (each of which uses a new Inspector) are served by the same catalog
+        queries.  Inspectors bound to an Engine keep them in their own
+        ``info_cache`` instead.
+        """
+        if isinstance(connection, Connection):
+            self._lock.acquire()
+            try:
+                store = self._bulk_results.get(connection.connection)
+                if store is None:
+                    store = self._bulk_results[connection.connection] = {}
+                return store
+            finally:
+                self._lock.release()
+        elif info_cache is not None:
+            return info_cache.setdefault('db2_bulk_reflection', {})
+        else:
+            return None
+
+    def transaction_ended(self, dbapi_connection):
+        """Forget the schema-wide results fetched on ``dbapi_connection``,
+        as other connections may have changed the catalog since."""
+        self._lock.acquire()
+        try:
+            self._bulk_results.pop(dbapi_connection, None)
+        except TypeError:
+            # not weakly referenceable, so not a key: a raw connection
+            # being reset by the pool
+            pass
+        finally:
+            self._lock.release()
+
+    def _reflect_table(self, kind, connection, table_name, schema, **kw):
+        """Return the ``kind`` information for one table, serving it from
+        the schema-wide results when those are available."""
+        fetch = getattr(self, '_get_all_%s' % kind)
+        table_key = self._table_key(table_name)
+        store = self._bulk_store(connection, kw.get('info_cache'))
+        if store is not None:
+            tables = store.get((kind, schema))
+            if tables is not None and table_key in tables:
+                return tables[table_key]
+            if (kind, schema, None) in store:
+                return []
+            if self.snapshot is not None:
+                self._sync_snapshot(connection, schema, store)
+                return store[(kind, schema)].get(table_key, [])
+            if self.dialect.bulk_reflection and \
+                    self.dialect.reflection_threads > 1:
+                self._prefetch(connection, schema, None, store)
+                return store[(kind, schema)].get(table_key, [])
+            if self.dialect.bulk_reflection:
+                tables = store.setdefault((kind, schema), {})
+                tables.update(fetch(connection, schema))
+                store[(kind, schema, None)] = True
+                return tables.get(table_key, [])
+        return fetch(connection, schema, [table_name]).get(table_key, [])
+
+    def _has_object(self, kind, connection, name, schema):
+        """Tell whether the table or sequence ``name`` exists.
+
+        With ``bulk_has_table``, the first lookup of a schema on a
+        connection queries for that one name.  From the second on, all the
+        names of the schema are fetched at once and kept until the
+        connection goes back to the pool, so that ``create_all()`` and
+        ``drop_all()`` make one query per schema.
+        """
+        store = self._names_store(connection)
+        if store is not None and (kind, schema) in store:
+            return self._table_key(name) in \
+                        self._object_names(kind, connection, schema)
+        if store is not None:
+            store[(kind, schema)] = None
+        return self._execute_catalog(connection,
+                    getattr(self, '_%s_query' % kind),
+                    schema, [name]).first() is not None
+
+    def _object_names(self, kind, connection, schema):
+        store = self._names_store(connection)
+        names = None
+        if store is not None:
+            names = store.get((kind, schema))
+        if names is None:
+            names = set(self.normalize_name(r[0]) for r in
+                        self._execute_catalog(connection,
+                                    getattr(self, '_%s_query' % kind),
+                                    schema, None))
+            if store is not None:
+                store[(kind, schema)] = names
+        return names
+
+    def _names_store(self, connection):
+        """Return the dictionary holding the table and sequence names
+        fetched for ``connection`` with ``bulk_has_table``, or None."""
+        if not self.dialect.bulk_has_table or \
+                not isinstance(connection, Connection):
+            return None
+        return connection.info.setdefault('ibm_db_sa_object_names', {})
+
+    def drop_object_names(self, dbapi_connection, connection_record):
+        """Pool listener forgetting the names kept for a connection as it
+        is checked in, see _has_object()."""
+        if connection_record is not None:
+            connection_record.info.pop('ibm_db_sa_object_names', None)
+
+    def catalog_changed(self, connection, ddl=None):
+        """Bring what is kept for ``connection`` up to date after it has
+        executed the DDL construct ``ddl``.
+
+        Tables and sequences created or dropped are added to or removed
+        from the known names; other results which may have become stale
+        are forgotten, all of them if ``ddl`` is None.  The catalog cache
+        drops what it holds about a sequence created or dropped, about
+        the schema of a table the DDL applies to, or else everything.
+        """
+        element = getattr(ddl, 'element', None)
+        if isinstance(element, Sequence):
+            self._invalidate_catalog_cache(element.name,
+                        element.schema or self.default_schema_name)
+        elif isinstance(element, Table):
+            self._invalidate_catalog_cache(
+                        schema=element.schema or self.default_schema_name)
+        elif isinstance(getattr(element, 'table', None), Table):
+            self._invalidate_catalog_cache(
+                        schema=element.table.schema or
+                                self.default_schema_name)
+        else:
+            self._invalidate_catalog_cache()
+
+        if isinstance(ddl, (CreateTable, DropTable)):
+            kind = 'table_names'
+        elif isinstance(ddl, (CreateSequence, DropSequence)):
+            kind = 'sequence_names'
+        else:
+            kind = None
+
+        if isinstance(connection, Connection) and \
+                kind != 'sequence_names':
+            self.transaction_ended(connection.connection)
+
+        store = self._names_store(connection)
+        if not store:
+            return
+        if kind is None:
+            store.clear()
+            return
+        names = store.get((kind, ddl.element.schema))
+        if names is not None:
+            name = self._table_key(ddl.element.name)
+            if isinstance(ddl, (CreateTable, CreateSequence)):
+                names.add(name)
+            else:
+                names.discard(name)
+
+    def prefetch(self, connection, schema=None, table_names=None):
+        """Fetch the columns, primary keys, foreign keys and indexes of
+        all the tables in ``schema``, or only of ``table_names``, using one
+        catalog query per kind.  With ``reflection_threads`` set, the
+        queries (and ``table_names``) are spread over that many threads.
+
+        Subsequent per-table reflection calls made with the same
+        ``connection`` are answered from these results, until it commits
+        or rolls back.
+        """
+        store = self._bulk_store(connection, None)
+        if store is None:
+            raise TypeError("prefetch() requires a Connection")
+        self._prefetch(connection, schema, table_names, store)
+
+    def _prefetch(self, connection, schema, table_names, store):
+        threads = self._reflection_threads(connection)
+        if table_names is None or threads <= 1:
+            chunks = [table_names]
+        else:
+            size = -(-len(table_names) // threads)
+            chunks = [table_names[i:i + size]
+                        for i in range(0, len(table_names), size)]
+        units = [(kind, chunk) for kind in self.bulk_kinds
+                                for chunk in chunks]
+
+        if threads > 1:
+            results = self._fetch_parallel(
+                            connection.engine, schema, units, threads)
+        else:
+            results = [getattr(self, '_get_all_%s' % kind)(
+                                connection, schema, chunk)
+                        for kind, chunk in units]
+
+        # merged in the order of the units, whatever the order in which
+        # the threads completed them
+        for (kind, chunk), fetched in zip(units, results):
+            if chunk is None:
+                store[(kind, schema, None)] = True
+            else:
+                for table_name in chunk:
+                    fetched.setdefault(self._table_key(table_name), [])
+            store.setdefault((kind, schema), {}).update(fetched)
+
+    def _reflection_threads(self, connection):
+        """Return the number of threads to spread the bulk queries over.
+
+        A connection in a transaction may see tables which other
+        connections can't, so its queries are all run on it.  Otherwise
+        no more threads are started than the pool has connections left.
+        """
+        threads = self.dialect.reflection_threads
+        if threads <= 1 or connection.in_transaction():
+            return 1
+        engine_pool = connection.engine.pool
+        if isinstance(engine_pool, pool.QueuePool):
+            if engine_pool._max_overflow > -1:
+                threads = min(threads, engine_pool.size() +
+                                engine_pool._max_overflow -
+                                engine_pool.checkedout())
+        elif isinstance(engine_pool, (pool.StaticPool, pool.AssertionPool)):
+            # one connection, already used by the caller
+            return 1
+        return max(threads, 1)
+
+    def _fetch_parallel(self, engine, schema, units, threads):
+        """Run the ``(kind, table_names)`` fetches of ``units`` on up to
+        ``threads`` threads, each using its own pooled connection, and
+        return their results in the order of ``units``.
+
+        The workers only read the class-level catalog tables, and don't
+        share an Inspector's ``info_cache``.
+        """
+        results = [None] * len(units)
+        errors = []
+        pending = Queue.Queue()
+        for index, unit in enumerate(units):
+            pending.put((index, unit))
+
+        def work():
+            try:
+                conn = engine.connect()
+                try:
+                    while True:
+                        try:
+                            index, (kind, table_names) = pending.get_nowait()
+                        except Queue.Empty:
+                            return
+                        results[index] = getattr(self, '_get_all_%s' % kind)(
+                                            conn, schema, table_names)
+                finally:
+                    conn.close()
+            except Exception:
+                errors.append(sys.exc_info())
+
+        workers = [threading.Thread(target=work)
+                    for i in range(min(threads, len(units)))]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        if errors:
+            raise errors[0][0], errors[0][1], errors[0][2]
+        return results
+
+    def _database_identity(self, connection):
+        """Return ``(host, port, CURRENT SERVER)`` for the database of
+        ``connection``, telling apart the schemas kept in a snapshot file
+        shared by engines connected to different databases."""
+        if self._database is None:
+            url = connection.engine.url
+            server = connection.execute(
+                    u'SELECT CURRENT SERVER FROM SYSIBM.SYSDUMMY1').scalar()
+            self._database = (url.host, url.port, server and server.strip())
+        return self._database
+
+    def _sync_snapshot(self, connection, schema, store):
+        """Fill ``store`` with the results for every table of ``schema``,
+        taken from the snapshot for the tables which haven't been altered
+        since and fetched from the catalog for the others."""
+        current_schema = self.normalize_name(
+                    self.denormalize_name(schema or self.default_schema_name))
+        snapshot_key = (self._database_identity(connection), schema,
+                        current_schema)
+        alter_times = self._get_alter_times(connection, schema)
+        cached = self.snapshot.get_schema(snapshot_key)
+        stale = set(name for name, alter_time in alter_times.iteritems()
+                    if name not in cached or cached[name][0] != alter_time)
+
+        if len(stale) > len(alter_times) // 2:
+            self._prefetch(connection, schema, None, store)
+        elif stale:
+            self._prefetch(connection, schema, list(stale), store)
+
+        entries = {}
+        for name, alter_time in alter_times.iteritems():
+            if name in stale:
+                entries[name] = (alter_time, dict(
+                                    (kind, store[(kind, schema)].get(name, []))
+                                    for kind in self.bulk_kinds))
+            else:
+                entries[name] = cached[name]
+                for kind, result in cached[name][1].iteritems():
+                    store.setdefault((kind, schema), {})[name] = result
+        for kind in self.bulk_kinds:
+            store.setdefault((kind, schema), {})
+            store[(kind, schema, None)] = True
+
+        if stale or len(entries) != len(cached):
+            self.snapshot.set_schema(snapshot_key, entries)
+
+    @catalog_cache
+    def has_table(self, connection, table_name, schema=None):
+        return self._has_object('table_names', connection, table_name, schema)
+
+    @catalog_cache
+    def has_sequence(self, connection, sequence_name, schema=None):
+        return self._has_object('sequence_names', connection, sequence_name,
+                                    schema)
+
+    def has_tables(self, connection, table_names, schema=None):
+        names = self._object_names('table_names', connection, schema)
+        return dict((name, self._table_key(name) in names)
+                    for name in table_names)
+
+    def has_sequences(self, connection, sequence_names, schema=None):
+        names = self._object_names('sequence_names', connection, schema)
+        return dict((name, self._table_key(name) in names)
+                    for name in sequence_names)
+
+    @reflection.cache
+    @catalog_cache
+    def get_columns(self, connection, table_name, schema=None, **kw):
+        return self._reflect_table('columns', connection, table_name,
+                                    schema, **kw)
+
+    @reflection.cache
+    @catalog_cache
+    def get_primary_keys(self, connection, table_name, schema=None, **kw):
+        return self._reflect_table('primary_keys', connection, table_name,
+                                    schema, **kw)
+
+    @reflection.cache
+    @catalog_cache
+    def get_foreign_keys(self, connection, table_name, schema=None, **kw):
+        return self._reflect_table('foreign_keys', connection, table_name,
+                                    schema, **kw)
+
+    @reflection.cache
+    @catalog_cache
+    def get_indexes(self, connection, table_name, schema=None,
+                            include_primary_key=False, **kw):
+        indexes = self._reflect_table('indexes', connection, table_name,
+                                    schema, **kw)
+        if include_primary_key:
+            return indexes
+        return [index for index in indexes if not index.get('primary_key')]
+
 class DB2Reflector(BaseReflector):
     ischema = MetaData()
 
@@ -99,14 +915,33 @@ class DB2Reflector(BaseReflector):
       Column("OWNERTYPE", CoerceUnicode, key="ownertype"),
       Column("TYPE", CoerceUnicode, key="type"),
       Column("STATUS", CoerceUnicode, key="status"),
+      Column("ALTER_TIME", sa_types.DateTime, key="alter_time"),
+      Column("CARD", sa_types.BigInteger, key="card"),
+      Column("NPAGES", sa_types.BigInteger, key="npages"),
+      Column("FPAGES", sa_types.BigInteger, key="fpages"),
+      Column("OVERFLOW", sa_types.BigInteger, key="overflow"),
+      Column("STATS_TIME", sa_types.DateTime, key="stats_time"),
       schema="SYSCAT")
 
     sys_indexes = Table("INDEXES", ischema,
       Column("TABSCHEMA", CoerceUnicode, key="tabschema"),
       Column("TABNAME", CoerceUnicode, key="tabname"),
+      Column("INDSCHEMA", CoerceUnicode, key="indschema"),
       Column("INDNAME", CoerceUnicode, key="indname"),
       Column("COLNAMES", CoerceUnicode, key="colnames"),
       Column("UNIQUERULE", CoerceUnicode, key="uniquerule"),
+      Column("INDEXTYPE", CoerceUnicode, key="indextype"),
+      Column("FULLKEYCARD", sa_types.BigInteger, key="fullkeycard"),
+      Column("CLUSTERRATIO", sa_types.Integer, key="clusterratio"),
+      Column("CLUSTERFACTOR", sa_types.Float, key="clusterfactor"),
+      schema="SYSCAT")
+
+    sys_index_columns = Table("INDEXCOLUSE", ischema,
+      Column("INDSCHEMA", CoerceUnicode, key="indschema"),
+      Column("INDNAME", CoerceUnicode, key="indname"),
+      Column("COLNAME", CoerceUnicode, key="colname"),
+      Column("COLSEQ", sa_types.Integer, key="colseq"),
+      Column("COLORDER", CoerceUnicode, key="colorder"),
       schema="SYSCAT")
 
     sys_foreignkeys = Table("SQLFOREIGNKEYS", ischema,
@@ -144,31 +979,23 @@ class DB2Reflector(BaseReflector):
       Column("SEQNAME", CoerceUnicode, key="seqname"),
       schema="SYSCAT")
 
-    def has_table(self, connection, table_name, schema=None):
-        current_schema = self.denormalize_name(
-                            schema or self.default_schema_name)
-        table_name = self.denormalize_name(table_name)
-        if current_schema:
-            whereclause = sql.and_(self.sys_tables.c.tabschema == current_schema,
-                                   self.sys_tables.c.tabname == table_name)
-        else:
-            whereclause = self.sys_tables.c.tabname == table_name
-        s = sql.select([self.sys_tables.c.tabname], whereclause)
-        c = connection.execute(s)
-        return c.first() is not None
+    def _table_names_query(self, table_filter):
+        systbl = self.sys_tables
+        return sql.select([systbl.c.tabname],
+            sql.and_(
+                systbl.c.tabschema == _schema_param(),
+                *table_filter(systbl.c.tabname)
+            ))
 
-    def has_sequence(self, connection, sequence_name, schema=None):
-        current_schema = self.denormalize_name(schema or self.default_schema_name)
-        sequence_name = self.denormalize_name(sequence_name)
-        if current_schema:
-            whereclause = sql.and_(self.sys_sequences.c.seqschema == current_schema,
-                                   self.sys_sequences.c.seqname == sequence_name)
-        else:
-            whereclause = self.sys_sequences.c.seqname == sequence_name
-        s = sql.select([self.sys_sequences.c.seqname], whereclause)
-        c = connection.execute(s)
-        return c.first() is not None
+    def _sequence_names_query(self, table_filter):
+        sysseq = self.sys_sequences
+        return sql.select([sysseq.c.seqname],
+            sql.and_(
+                sysseq.c.seqschema == _schema_param(),
+                *table_filter(sysseq.c.seqname)
+            ))
 
+    @catalog_cache
     def get_schema_names(self, connection, **kw):
         sysschema = self.sys_schemas
         query = sql.select([sysschema.c.schemaname],
@@ -177,8 +1004,14 @@ class DB2Reflector(BaseReflector):
         )
         return [self.normalize_name(r[0]) for r in connection.execute(query)]
 
+    def iter_schema_names(self, connection, pattern=None, page_size=1000):
+        sysschema = self.sys_schemas
+        return self._iter_names(connection, sysschema.c.schemaname,
+                    [sql.not_(sysschema.c.schemaname.like('SYS%'))],
+                    pattern, page_size)
 
     @reflection.cache
+    @catalog_cache
     def get_table_names(self, connection, schema=None, **kw):
         current_schema = self.denormalize_name(schema or self.default_schema_name)
         systbl = self.sys_tables
@@ -189,6 +1022,7 @@ class DB2Reflector(BaseReflector):
         return [self.normalize_name(r[0]) for r in connection.execute(query)]
 
     @reflection.cache
+    @catalog_cache
     def get_view_names(self, connection, schema=None, **kw):
         current_schema = self.denormalize_name(schema or self.default_schema_name)
 
@@ -198,7 +1032,23 @@ class DB2Reflector(BaseReflector):
           )
         return [self.normalize_name(r[0]) for r in connection.execute(query)]
 
+    def iter_table_names(self, connection, schema=None, pattern=None,
+                                page_size=1000):
+        current_schema = self.denormalize_name(schema or self.default_schema_name)
+        systbl = self.sys_tables
+        return self._iter_names(connection, systbl.c.tabname,
+                    [systbl.c.type == 'T', systbl.c.tabschema == current_schema],
+                    pattern, page_size)
+
+    def iter_view_names(self, connection, schema=None, pattern=None,
+                                page_size=1000):
+        current_schema = self.denormalize_name(schema or self.default_schema_name)
+        return self._iter_names(connection, self.sys_views.c.viewname,
+                    [self.sys_views.c.viewschema == current_schema],
+                    pattern, page_size)
+
     @reflection.cache
+    @catalog_cache
     def get_view_definition(self, connection, viewname, schema=None, **kw):
         current_schema = self.denormalize_name(schema or self.default_schema_name)
         viewname = self.denormalize_name(viewname)
@@ -212,82 +1062,94 @@ class DB2Reflector(BaseReflector):
         return connection.execute(query).scalar()
 
     @reflection.cache
-    def get_columns(self, connection, table_name, schema=None, **kw):
+    @catalog_cache
+    def get_table_statistics(self, connection, table_name, schema=None, **kw):
         current_schema = self.denormalize_name(schema or self.default_schema_name)
-        table_name = self.denormalize_name(table_name)
-        syscols = self.sys_columns
+        systbl = self.sys_tables
+        query = sql.select([systbl.c.card, systbl.c.npages, systbl.c.fpages,
+                            systbl.c.overflow, systbl.c.stats_time],
+            sql.and_(
+                systbl.c.tabschema == current_schema,
+                systbl.c.tabname == self.denormalize_name(table_name),
+            ),
+        )
+        return self._table_statistics(table_name,
+                                        connection.execute(query).first())
+
+    def _get_alter_times(self, connection, schema=None):
+        current_schema = self.denormalize_name(schema or self.default_schema_name)
+        systbl = self.sys_tables
+        query = sql.select([systbl.c.tabname, systbl.c.alter_time],
+                    systbl.c.tabschema == current_schema)
+        return dict((self.normalize_name(r[0]), r[1])
+                    for r in connection.execute(query))
 
-        query = sql.select([syscols.c.colname, syscols.c.typename,
-                            syscols.c.defaultval, syscols.c.nullable,
-                            syscols.c.length, syscols.c.scale],
+    def _columns_query(self, table_filter):
+        syscols = self.sys_columns
+        return sql.select([syscols.c.tabname, syscols.c.colname,
+                            syscols.c.typename, syscols.c.defaultval,
+                            syscols.c.nullable, syscols.c.length,
+                            syscols.c.scale],
               sql.and_(
-                  syscols.c.tabschema == current_schema,
-                  syscols.c.tabname == table_name
+                  syscols.c.tabschema == _schema_param(),
+                  *table_filter(syscols.c.tabname)
                 ),
-              order_by=[syscols.c.colno]
+              order_by=[syscols.c.tabname, syscols.c.colno]
             )
-        sa_columns = []
-        for r in connection.execute(query):
-            coltype = r[1].upper()
-            if coltype in ['DECIMAL', 'NUMERIC']:
-                coltype = self.ischema_names.get(coltype)(int(r[4]), int(r[5]))
-            elif coltype in ['CHARACTER', 'CHAR', 'VARCHAR',
-                            'GRAPHIC', 'VARGRAPHIC']:
-                coltype = self.ischema_names.get(coltype)(int(r[4]))
-            else:
-                try:
-                    coltype = self.ischema_names[coltype]
-                except KeyError:
-                    util.warn("Did not recognize type '%s' of column '%s'" %
-                            (coltype, r[0]))
-                    coltype = coltype = sa_types.NULLTYPE
 
-            sa_columns.append({
-                    'name': self.normalize_name(r[0]),
-                    'type': coltype,
-                    'nullable': r[3] == 'Y',
-                    'default': r[2] or None,
+    def _get_all_columns(self, connection, schema=None, table_names=None):
+        sa_columns = {}
+        for r in self._execute_catalog(connection, self._columns_query,
+                                    schema, table_names):
+            sa_columns.setdefault(self.normalize_name(r[0]), []).append({
+                    'name': self.normalize_name(r[1]),
+                    'type': self._column_type(r[2], r[5], r[6], r[1]),
+                    'nullable': r[4] == 'Y',
+                    'default': r[3] or None,
                 })
         return sa_columns
 
-    @reflection.cache
-    def get_primary_keys(self, connection, table_name, schema=None, **kw):
-        current_schema = self.denormalize_name(schema or self.default_schema_name)
-        table_name = self.denormalize_name(table_name)
+    def _primary_keys_query(self, table_filter):
         sysindexes = self.sys_indexes
-        col_finder = re.compile("(\w+)")
-        query = sql.select([sysindexes.c.colnames],
+        return sql.select([sysindexes.c.tabname, sysindexes.c.colnames],
               sql.and_(
-                  sysindexes.c.tabschema == current_schema,
-                  sysindexes.c.tabname == table_name,
-                  sysindexes.c.uniquerule == 'P'
+                  sysindexes.c.tabschema == _schema_param(),
+                  sysindexes.c.uniquerule == 'P',
+                  *table_filter(sysindexes.c.tabname)
                 ),
               order_by=[sysindexes.c.tabschema, sysindexes.c.tabname]
             )
-        pk_columns = []
-        for r in connection.execute(query):
-            cols = col_finder.findall(r[0])
-            pk_columns.extend(cols)
-        return [self.normalize_name(col) for col in pk_columns]
 
-    @reflection.cache
-    def get_foreign_keys(self, connection, table_name, schema=None, **kw):
-        current_schema = self.denormalize_name(schema or self.default_schema_name)
-        table_name = self.denormalize_name(table_name)
+    def _get_all_primary_keys(self, connection, schema=None, table_names=None):
+        col_finder = re.compile("(\w+)")
+        pk_columns = {}
+        for r in self._execute_catalog(connection, self._primary_keys_query,
+                                    schema, table_names):
+            cols = col_finder.findall(r[1])
+            pk_columns.setdefault(self.normalize_name(r[0]), []).extend(
+                                    self.normalize_name(col) for col in cols)
+        return pk_columns
+
+    def _foreign_keys_query(self, table_filter):
         sysfkeys = self.sys_foreignkeys
-        query = sql.select([sysfkeys.c.fkname, sysfkeys.c.fktabschema, \
+        return sql.select([sysfkeys.c.fkname, sysfkeys.c.fktabschema, \
                             sysfkeys.c.fktabname, sysfkeys.c.fkcolname, \
                             sysfkeys.c.pkname, sysfkeys.c.pktabschema, \
                             sysfkeys.c.pktabname, sysfkeys.c.pkcolname],
             sql.and_(
-              sysfkeys.c.fktabschema == current_schema,
-              sysfkeys.c.fktabname == table_name
+              sysfkeys.c.fktabschema == _schema_param(),
+              *table_filter(sysfkeys.c.fktabname)
             ),
-            order_by=[sysfkeys.c.colno]
+            order_by=[sysfkeys.c.fktabname, sysfkeys.c.fkname,
+                      sysfkeys.c.colno]
           )
 
-        fschema = {}
-        for r in connection.execute(query):
+    def _get_all_foreign_keys(self, connection, schema=None, table_names=None):
+        tables = {}
+        for r in self._execute_catalog(connection, self._foreign_keys_query,
+                                    schema, table_names):
+            fschema = tables.setdefault(self.normalize_name(r[2]),
+                                        util.OrderedDict())
             if not fschema.has_key(r[0]):
                 referred_schema = self.normalize_name(r[5])
 
@@ -306,37 +1168,57 @@ class DB2Reflector(BaseReflector):
             else:
                 fschema[r[0]]['constrained_columns'].append(self.normalize_name(r[3]))
                 fschema[r[0]]['referred_columns'].append(self.normalize_name(r[7]))
-        return [value for key, value in fschema.iteritems()]
-
+        return dict((table, fschema.values())
+                    for table, fschema in tables.iteritems())
 
-    @reflection.cache
-    def get_indexes(self, connection, table_name, schema=None, **kw):
-        current_schema = self.denormalize_name(schema or self.default_schema_name)
-        table_name = self.denormalize_name(table_name)
+    def _indexes_query(self, table_filter):
         sysidx = self.sys_indexes
-        query = sql.select([sysidx.c.indname, sysidx.c.colnames, sysidx.c.uniquerule],
+        sysidxcol = self.sys_index_columns
+        return sql.select([sysidx.c.tabname, sysidx.c.indname,
+                            sysidx.c.uniquerule, sysidx.c.indextype,
+                            sysidx.c.fullkeycard, sysidx.c.clusterratio,
+                            sysidx.c.clusterfactor, sysidxcol.c.colname,
+                            sysidxcol.c.colorder],
             sql.and_(
-              sysidx.c.tabschema == current_schema,
-              sysidx.c.tabname == table_name
+              sysidxcol.c.indschema == sysidx.c.indschema,
+              sysidxcol.c.indname == sysidx.c.indname,
+              sysidx.c.tabschema == _schema_param(),
+              *table_filter(sysidx.c.tabname)
             ),
-            order_by=[sysidx.c.tabname]
+            order_by=[sysidx.c.tabname, sysidx.c.indname, sysidxcol.c.colseq]
           )
-        indexes = []
-        col_finder = re.compile("(\w+)")
-        for r in connection.execute(query):
-            if r[2] != 'P':
-                indexes.append({
-                        'name': self.normalize_name(r[0]),
-                        'column_names': [self.normalize_name(col)
-                                        for col in col_finder.findall(r[1])],
-                        'unique': r[2] == 'U'
-                    })
+
+    # The column order codes of SYSCAT.INDEXCOLUSE are those of
+    # index_column_sorting, with 'I' for INCLUDE columns.  CLUSTERRATIO is
+    # a percentage, or -1 if detailed statistics were collected, in which
+    # case CLUSTERFACTOR is used.
+    def _get_all_indexes(self, connection, schema=None, table_names=None):
+        indexes = {}
+        for r, group in itertools.groupby(
+            self._execute_catalog(connection, self._indexes_query,
+                                  schema, table_names),
+            lambda r: tuple(r[0:7])
+        ):
+            if r[5] is not None and r[5] >= 0:
+                cluster_ratio = r[5] / 100.0
+            else:
+                cluster_ratio = r[6]
+            indexes.setdefault(self.normalize_name(r[0]), []).append(
+                self._index(r[1], r[2] in ('U', 'P'),
+                            [(x[7], x[8]) for x in group],
+                            primary_key=r[2] == 'P',
+                            clustered=r[3] == 'CLUS',
+                            full_key_cardinality=r[4],
+                            cluster_ratio=cluster_ratio))
         return indexes
 
 class AS400Reflector(BaseReflector):
 
     ischema = MetaData()
 
+    # QSYS2.SYSCOLUMNS.LENGTH is the precision of DECFLOAT columns
+    decfloat_precisions = {16: 16, 34: 34}
+
     sys_schemas = Table("SQLSCHEMAS", ischema,
       Column("TABLE_SCHEM", CoerceUnicode, key="schemaname"),
       schema="SYSIBM")
@@ -345,6 +1227,13 @@ class AS400Reflector(BaseReflector):
       Column("TABLE_SCHEMA", CoerceUnicode, key="tabschema"),
       Column("TABLE_NAME", CoerceUnicode, key="tabname"),
       Column("TABLE_TYPE", CoerceUnicode, key="tabtype"),
+      Column("LAST_ALTERED_TIMESTAMP", sa_types.DateTime, key="alter_time"),
+      schema="QSYS2")
+
+    sys_table_stats = Table("SYSTABLESTAT", ischema,
+      Column("TABLE_SCHEMA", CoerceUnicode, key="tabschema"),
+      Column("TABLE_NAME", CoerceUnicode, key="tabname"),
+      Column("NUMBER_ROWS", sa_types.BigInteger, key="card"),
       schema="QSYS2")
 
     sys_table_constraints = Table("SYSCST", ischema,
@@ -417,35 +1306,24 @@ class AS400Reflector(BaseReflector):
       Column("SEQUENCE_NAME", CoerceUnicode, key="seqname"),
       schema="QSYS2")
 
-    def has_table(self, connection, table_name, schema=None):
-        current_schema = self.denormalize_name(
-                                schema or self.default_schema_name)
-        table_name = self.denormalize_name(table_name)
-        if current_schema:
-                whereclause = sql.and_(
-                            self.sys_tables.c.tabschema == current_schema,
-                            self.sys_tables.c.tabname == table_name)
-        else:
-                whereclause = self.sys_tables.c.tabname == table_name
-        s = sql.select([self.sys_tables], whereclause)
-        c = connection.execute(s)
-        return c.first() is not None
+    def _table_names_query(self, table_filter):
+        systbl = self.sys_tables
+        return sql.select([systbl.c.tabname],
+                sql.and_(
+                    systbl.c.tabschema == _schema_param(),
+                    *table_filter(systbl.c.tabname)
+            ))
 
-    def has_sequence(self, connection, sequence_name, schema=None):
-        current_schema = self.denormalize_name(
-                                schema or self.default_schema_name)
-        sequence_name = self.denormalize_name(sequence_name)
-        if current_schema:
-                whereclause = sql.and_(
-                            self.sys_sequences.c.seqschema == current_schema,
-                            self.sys_sequences.c.seqname == sequence_name)
-        else:
-                whereclause = self.sys_sequences.c.seqname == sequence_name
-        s = sql.select([self.sys_sequences.c.seqname], whereclause)
-        c = connection.execute(s)
-        return c.first() is not None
+    def _sequence_names_query(self, table_filter):
+        sysseq = self.sys_sequences
+        return sql.select([sysseq.c.seqname],
+                sql.and_(
+                    sysseq.c.seqschema == _schema_param(),
+                    *table_filter(sysseq.c.seqname)
+            ))
 
     @reflection.cache
+    @catalog_cache
     def get_schema_names(self, connection, **kw):
         sysschema = self.sys_schemas
         query = sql.select([sysschema.c.schemaname],
@@ -455,8 +1333,16 @@ class AS400Reflector(BaseReflector):
         )
         return [self.normalize_name(r[0]) for r in connection.execute(query)]
 
+    def iter_schema_names(self, connection, pattern=None, page_size=1000):
+        sysschema = self.sys_schemas
+        return self._iter_names(connection, sysschema.c.schemaname,
+                    [sql.not_(sysschema.c.schemaname.like('SYS%')),
+                     sql.not_(sysschema.c.schemaname.like('Q%'))],
+                    pattern, page_size)
+
     # Retrieves a list of table names for a given schema
     @reflection.cache
+    @catalog_cache
     def get_table_names(self, connection, schema=None, **kw):
         current_schema = self.denormalize_name(
                             schema or self.default_schema_name)
@@ -468,6 +1354,7 @@ class AS400Reflector(BaseReflector):
         return [self.normalize_name(r[0]) for r in connection.execute(query)]
 
     @reflection.cache
+    @catalog_cache
     def get_view_names(self, connection, schema=None, **kw):
         current_schema = self.denormalize_name(
                                 schema or self.default_schema_name)
@@ -478,7 +1365,25 @@ class AS400Reflector(BaseReflector):
             )
         return [self.normalize_name(r[0]) for r in connection.execute(query)]
 
+    def iter_table_names(self, connection, schema=None, pattern=None,
+                                page_size=1000):
+        current_schema = self.denormalize_name(
+                                schema or self.default_schema_name)
+        systbl = self.sys_tables
+        return self._iter_names(connection, systbl.c.tabname,
+                    [systbl.c.tabschema == current_schema],
+                    pattern, page_size)
+
+    def iter_view_names(self, connection, schema=None, pattern=None,
+                                page_size=1000):
+        current_schema = self.denormalize_name(
+                                schema or self.default_schema_name)
+        return self._iter_names(connection, self.sys_views.c.viewname,
+                    [self.sys_views.c.viewschema == current_schema],
+                    pattern, page_size)
+
     @reflection.cache
+    @catalog_cache
     def get_view_definition(self, connection, viewname, schema=None, **kw):
         current_schema = self.denormalize_name(
                                 schema or self.default_schema_name)
@@ -492,87 +1397,100 @@ class AS400Reflector(BaseReflector):
         )
         return connection.execute(query).scalar()
 
+    # QSYS2 keeps the number of rows of each table current, but has no
+    # page counts
     @reflection.cache
-    def get_columns(self, connection, table_name, schema=None, **kw):
+    @catalog_cache
+    def get_table_statistics(self, connection, table_name, schema=None, **kw):
         current_schema = self.denormalize_name(
                                 schema or self.default_schema_name)
-        table_name = self.denormalize_name(table_name)
-        syscols = self.sys_columns
+        tabstat = self.sys_table_stats
+        query = sql.select([tabstat.c.card],
+            sql.and_(
+                tabstat.c.tabschema == current_schema,
+                tabstat.c.tabname == self.denormalize_name(table_name),
+            ),
+        )
+        row = connection.execute(query).first()
+        return self._table_statistics(table_name,
+                                row and (row[0], None, None, None, None))
 
-        query = sql.select([syscols.c.colname,
+    def _get_alter_times(self, connection, schema=None):
+        current_schema = self.denormalize_name(
+                                schema or self.default_schema_name)
+        systbl = self.sys_tables
+        query = sql.select([systbl.c.tabname, systbl.c.alter_time],
+                    systbl.c.tabschema == current_schema)
+        return dict((self.normalize_name(r[0]), r[1])
+                    for r in connection.execute(query))
+
+    def _columns_query(self, table_filter):
+        syscols = self.sys_columns
+        return sql.select([syscols.c.tabname, syscols.c.colname,
                                 syscols.c.typename,
                                 syscols.c.defaultval, syscols.c.nullable,
                                 syscols.c.length, syscols.c.scale],
                     sql.and_(
-                            syscols.c.tabschema == current_schema,
-                            syscols.c.tabname == table_name
+                            syscols.c.tabschema == _schema_param(),
+                            *table_filter(syscols.c.tabname)
                         ),
                     order_by=[syscols.c.tabschema, syscols.c.tabname,
                                     syscols.c.colname, syscols.c.colno]
                 )
-        sa_columns = []
-        for r in connection.execute(query):
-            coltype = r[1].upper()
-            if coltype in ['DECIMAL', 'NUMERIC']:
-                coltype = self.ischema_names.get(coltype)(int(r[4]), int(r[5]))
-            elif coltype in ['CHARACTER', 'CHAR', 'VARCHAR',
-                                'GRAPHIC', 'VARGRAPHIC']:
-                coltype = self.ischema_names.get(coltype)(int(r[4]))
-            else:
-                try:
-                    coltype = self.ischema_names[coltype]
-                except KeyError:
-                    util.warn("Did not recognize type '%s' of column '%s'" %
-                                    (coltype, r[0]))
-                    coltype = coltype = sa_types.NULLTYPE
 
-            sa_columns.append({
-                    'name': self.normalize_name(r[0]),
-                    'type': coltype,
-                    'nullable': r[3] == 'Y',
-                    'default': r[2],
-                    'autoincrement': r[2] is None,
+    def _get_all_columns(self, connection, schema=None, table_names=None):
+        sa_columns = {}
+        for r in self._execute_catalog(connection, self._columns_query,
+                                    schema, table_names):
+            sa_columns.setdefault(self.normalize_name(r[0]), []).append({
+                    'name': self.normalize_name(r[1]),
+                    'type': self._column_type(r[2], r[5], r[6], r[1]),
+                    'nullable': r[4] == 'Y',
+                    'default': r[3],
+                    'autoincrement': r[3] is None,
                 })
         return sa_columns
 
-    @reflection.cache
-    def get_primary_keys(self, connection, table_name, schema=None, **kw):
-        current_schema = self.denormalize_name(
-                                    schema or self.default_schema_name)
-        table_name = self.denormalize_name(table_name)
+    def _primary_keys_query(self, table_filter):
         sysconst = self.sys_table_constraints
         syskeyconst = self.sys_key_constraints
-
-        query = sql.select([syskeyconst.c.colname, sysconst.c.tabname],
+        return sql.select([syskeyconst.c.colname, sysconst.c.tabname],
                 sql.and_(
                     syskeyconst.c.conschema == sysconst.c.conschema,
                     syskeyconst.c.conname == sysconst.c.conname,
-                    sysconst.c.tabschema == current_schema,
-                    sysconst.c.tabname == table_name,
-                    sysconst.c.contype == 'PRIMARY KEY'
-            ), order_by=[syskeyconst.c.colno])
-
-        return [self.normalize_name(key[0])
-                    for key in connection.execute(query)]
-
-    @reflection.cache
-    def get_foreign_keys(self, connection, table_name, schema=None, **kw):
-        current_schema = self.denormalize_name(
-                                    schema or self.default_schema_name)
-        table_name = self.denormalize_name(table_name)
+                    sysconst.c.tabschema == _schema_param(),
+                    sysconst.c.contype == 'PRIMARY KEY',
+                    *table_filter(sysconst.c.tabname)
+            ), order_by=[sysconst.c.tabname, syskeyconst.c.colno])
+
+    def _get_all_primary_keys(self, connection, schema=None, table_names=None):
+        pk_columns = {}
+        for key in self._execute_catalog(connection, self._primary_keys_query,
+                                    schema, table_names):
+            pk_columns.setdefault(self.normalize_name(key[1]), []).append(
+                                                self.normalize_name(key[0]))
+        return pk_columns
+
+    def _foreign_keys_query(self, table_filter):
         sysfkeys = self.sys_foreignkeys
-        query = sql.select([sysfkeys.c.fkname, sysfkeys.c.fktabschema, \
+        return sql.select([sysfkeys.c.fkname, sysfkeys.c.fktabschema, \
                                 sysfkeys.c.fktabname, sysfkeys.c.fkcolname, \
                                 sysfkeys.c.pkname, sysfkeys.c.pktabschema, \
                                 sysfkeys.c.pktabname, sysfkeys.c.pkcolname],
                 sql.and_(
-                    sysfkeys.c.fktabschema == current_schema,
-                    sysfkeys.c.fktabname == table_name
+                    sysfkeys.c.fktabschema == _schema_param(),
+                    *table_filter(sysfkeys.c.fktabname)
                 ),
-                order_by=[sysfkeys.c.colno]
+                order_by=[sysfkeys.c.fktabname, sysfkeys.c.fkname,
+                            sysfkeys.c.colno]
             )
-        fschema = {}
-        for r in connection.execute(query):
+
+    def _get_all_foreign_keys(self, connection, schema=None, table_names=None):
+        tables = {}
+        for r in self._execute_catalog(connection, self._foreign_keys_query,
+                                    schema, table_names):
+            fschema = tables.setdefault(self.normalize_name(r[2]),
+                                        util.OrderedDict())
             if not fschema.has_key(r[0]):
                 fschema[r[0]] = {'name': self.normalize_name(r[0]),
                             'constrained_columns': [self.normalize_name(r[3])],
@@ -584,37 +1502,38 @@ class AS400Reflector(BaseReflector):
                                                     self.normalize_name(r[3]))
                 fschema[r[0]]['referred_columns'].append(
                                                     self.normalize_name(r[7]))
-        return [value for key, value in fschema.iteritems()]
+        return dict((table, fschema.values())
+                    for table, fschema in tables.iteritems())
 
-    # Retrieves a list of index names for a given schema
-    @reflection.cache
-    def get_indexes(self, connection, table_name, schema=None, **kw):
-        current_schema = self.denormalize_name(
-                                    schema or self.default_schema_name)
-        table_name = self.denormalize_name(table_name)
+    # Retrieves the indexes of the tables in a given schema
+    def _indexes_query(self, table_filter):
         sysidx = self.sys_indexes
         syskey = self.sys_keys
-
-        query = sql.select([sysidx.c.indname,
-                            sysidx.c.uniquerule, syskey.c.colname], sql.and_(
+        return sql.select([sysidx.c.tabname, sysidx.c.indname,
+                            sysidx.c.uniquerule, syskey.c.colname,
+                            syskey.c.ordering], sql.and_(
                     syskey.c.indschema == sysidx.c.indschema,
                     syskey.c.indname == sysidx.c.indname,
-                    sysidx.c.tabschema == current_schema,
-                    sysidx.c.tabname == table_name
-                ), order_by=[syskey.c.indname, syskey.c.colno]
+                    sysidx.c.tabschema == _schema_param(),
+                    *table_filter(sysidx.c.tabname)
+                ), order_by=[sysidx.c.tabname, syskey.c.indname,
+                                syskey.c.colno]
             )
-        indexes = {}
-        for r in connection.execute(query):
-            key = r[0].upper()
-            if key in indexes:
-                indexes[key]['column_names'].append(self.normalize_name(r[2]))
-            else:
-                indexes[key] = {
-                                'name': self.normalize_name(r[0]),
-                                'column_names': [self.normalize_name(r[2])],
-                                'unique': r[1] == 'Y'
-                        }
-        return [value for key, value in indexes.iteritems()]
+
+    # QSYS2.SYSINDEXES has neither primary key nor clustering indexes, and
+    # no INCLUDE columns
+    def _get_all_indexes(self, connection, schema=None, table_names=None):
+        tables = {}
+        for r in self._execute_catalog(connection, self._indexes_query,
+                                    schema, table_names):
+            indexes = tables.setdefault(self.normalize_name(r[0]),
+                                        util.OrderedDict())
+            key = r[1].upper()
+            if key not in indexes:
+                indexes[key] = (r[1], r[2] == 'Y', [])
+            indexes[key][2].append((r[3], r[4] == 'D' and 'D' or 'A'))
+        return dict((table, [self._index(*index) for index in indexes.values()])
+                    for table, indexes in tables.iteritems())
 
 
 class ZOSReflector(BaseReflector):
@@ -624,6 +1543,10 @@ class ZOSReflector(BaseReflector):
         Column("NAME", CoerceUnicode, key="name"),
         Column("CREATOR", CoerceUnicode, key="creator"),
         Column("TYPE", CoerceUnicode, key="type"),
+        Column("ALTEREDTS", sa_types.DateTime, key="alteredts"),
+        Column("CARDF", sa_types.Float, key="cardf"),
+        Column("NPAGESF", sa_types.Float, key="npagesf"),
+        Column("STATSTIME", sa_types.DateTime, key="statstime"),
         schema="SYSIBM")
 
     sys_indexes = Table("SYSINDEXES", ischema,
@@ -632,6 +1555,9 @@ class ZOSReflector(BaseReflector):
         Column("TBNAME", CoerceUnicode, key="tbname"),
         Column("TBCREATOR", CoerceUnicode, key="tbcreator"),
         Column("UNIQUERULE", CoerceUnicode, key="uniquerule"),
+        Column("CLUSTERING", CoerceUnicode, key="clustering"),
+        Column("FULLKEYCARDF", sa_types.Float, key="fullkeycardf"),
+        Column("CLUSTERRATIOF", sa_types.Float, key="clusterratiof"),
         schema="SYSIBM")
 
     sys_keys = Table("SYSKEYS", ischema,
@@ -639,6 +1565,7 @@ class ZOSReflector(BaseReflector):
         Column("IXNAME", CoerceUnicode, key="ixname"),
         Column("COLNAME", CoerceUnicode, key="colname"),
         Column("COLSEQ", CoerceUnicode, key="colseq"),
+        Column("ORDERING", CoerceUnicode, key="ordering"),
         schema="SYSIBM")
 
     sys_keycoluse = Table("SYSKEYCOLUSE", ischema,
@@ -690,38 +1617,27 @@ class ZOSReflector(BaseReflector):
         Column("NAME", CoerceUnicode, key="name"),
         schema="SYSIBM")
 
-    def has_table(self, connection, table_name, schema=None):
-        current_schema = self.denormalize_name(
-            schema or self.default_schema_name)
-        table_name = self.denormalize_name(table_name)
-
-        clauses = [
-            self.sys_tables.c.name == table_name,
-            self.sys_tables.c.type == 'T',
-        ]
-        if current_schema:
-          clauses.append(self.sys_tables.c.creator == current_schema)
-
-        s = sql.select([self.sys_tables.c.name], sql.and_(*clauses))
-        c = connection.execute(s)
-        return c.first() is not None
-
-    def has_sequence(self, connection, sequence_name, schema=None):
-        current_schema = self.denormalize_name(
-            schema or self.default_schema_name)
-        sequence_name = self.denormalize_name(sequence_name)
-
-        clauses = [
-            self.sys_sequences.c.name == sequence_name,
-        ]
-        if current_schema:
-            clauses.append(self.sys_sequences.c.schema == current_schema)
+    def _table_names_query(self, table_filter):
+        return sql.select(
+            [self.sys_tables.c.name],
+            sql.and_(
+                self.sys_tables.c.creator == _schema_param(),
+                self.sys_tables.c.type == 'T',
+                *table_filter(self.sys_tables.c.name)
+            ),
+        )
 
-        s = sql.select([self.sys_sequences.c.name], sql.and_(*clauses))
-        c = connection.execute(s)
-        return c.first() is not None
+    def _sequence_names_query(self, table_filter):
+        return sql.select(
+            [self.sys_sequences.c.name],
+            sql.and_(
+                self.sys_sequences.c.schema == _schema_param(),
+                *table_filter(self.sys_sequences.c.name)
+            ),
+        )
 
     @reflection.cache
+    @catalog_cache
     def get_schema_names(self, connection, **kw):
         # Just select the distinct creator from all tables. Probably not the
         # best way...
@@ -731,7 +1647,12 @@ class ZOSReflector(BaseReflector):
         )
         return [self.normalize_name(r[0]) for r in connection.execute(query)]
 
+    def iter_schema_names(self, connection, pattern=None, page_size=1000):
+        return self._iter_names(connection, self.sys_tables.c.creator, [],
+                                pattern, page_size, distinct=True)
+
     @reflection.cache
+    @catalog_cache
     def get_table_names(self, connection, schema=None, **kw):
         current_schema = self.denormalize_name(
             schema or self.default_schema_name)
@@ -747,6 +1668,7 @@ class ZOSReflector(BaseReflector):
         return [self.normalize_name(r[0]) for r in connection.execute(query)]
 
     @reflection.cache
+    @catalog_cache
     def get_view_names(self, connection, schema=None, **kw):
         current_schema = self.denormalize_name(
             schema or self.default_schema_name)
@@ -762,7 +1684,28 @@ class ZOSReflector(BaseReflector):
         )
         return [self.normalize_name(r[0]) for r in connection.execute(query)]
 
+    def iter_table_names(self, connection, schema=None, pattern=None,
+                                page_size=1000):
+        current_schema = self.denormalize_name(
+            schema or self.default_schema_name)
+
+        return self._iter_names(connection, self.sys_tables.c.name,
+                    [self.sys_tables.c.creator == current_schema,
+                     self.sys_tables.c.type == 'T'],
+                    pattern, page_size)
+
+    def iter_view_names(self, connection, schema=None, pattern=None,
+                                page_size=1000):
+        current_schema = self.denormalize_name(
+            schema or self.default_schema_name)
+
+        # distinct, as for get_view_names()
+        return self._iter_names(connection, self.sys_views.c.name,
+                    [self.sys_views.c.creator == current_schema],
+                    pattern, page_size, distinct=True)
+
     @reflection.cache
+    @catalog_cache
     def get_view_definition(self, connection, view_name, schema=None, **kw):
         current_schema = self.denormalize_name(
             schema or self.default_schema_name)
@@ -778,14 +1721,47 @@ class ZOSReflector(BaseReflector):
         return ''.join(r[0] for r in connection.execute(query))
 
     @reflection.cache
-    def get_columns(self, connection, table_name, schema=None, **kw):
+    @catalog_cache
+    def get_table_statistics(self, connection, table_name, schema=None, **kw):
+        current_schema = self.denormalize_name(
+            schema or self.default_schema_name)
+
+        query = sql.select(
+            [self.sys_tables.c.cardf, self.sys_tables.c.npagesf,
+             self.sys_tables.c.statstime],
+            sql.and_(
+                self.sys_tables.c.creator == current_schema,
+                self.sys_tables.c.name == self.denormalize_name(table_name),
+            ),
+        )
+        row = connection.execute(query).first()
+        if row is not None:
+            # CARDF and NPAGESF are floating point, and STATSTIME is
+            # 0001-01-01 until RUNSTATS has been run
+            card, npages, stats_time = row
+            if stats_time is not None and stats_time.year == 1:
+                stats_time = None
+            row = (long(card) if card is not None else None,
+                   long(npages) if npages is not None else None,
+                   None, None, stats_time)
+        return self._table_statistics(table_name, row)
+
+    def _get_alter_times(self, connection, schema=None):
         current_schema = self.denormalize_name(
             schema or self.default_schema_name)
-        table_name = self.denormalize_name(table_name)
-        syscols = self.sys_columns
 
         query = sql.select(
+            [self.sys_tables.c.name, self.sys_tables.c.alteredts],
+            self.sys_tables.c.creator == current_schema,
+        )
+        return dict((self.normalize_name(r[0]), r[1])
+                    for r in connection.execute(query))
+
+    def _columns_query(self, table_filter):
+        syscols = self.sys_columns
+        return sql.select(
             [
+                syscols.c.tbname,
                 syscols.c.name,
                 syscols.c.coltype,
                 syscols.c.colno,
@@ -796,76 +1772,56 @@ class ZOSReflector(BaseReflector):
                 syscols.c.defaultvalue,
             ],
             sql.and_(
-                syscols.c.tbcreator == current_schema,
-                syscols.c.tbname == table_name
+                syscols.c.tbcreator == _schema_param(),
+                *table_filter(syscols.c.tbname)
             ),
-            order_by=[syscols.c.colno],
+            order_by=[syscols.c.tbname, syscols.c.colno],
         )
 
-        sa_columns = []
-
-        for r in connection.execute(query):
-            coltype = r[1].strip().upper()
-            if coltype in ['DECIMAL', 'NUMERIC']:
-                coltype = self.ischema_names.get(coltype)(int(r[4]), int(r[5]))
-            elif coltype in [
-                'CHARACTER', 'CHAR', 'VARCHAR', 'GRAPHIC', 'VARGRAPHIC',
-            ]:
-                coltype = self.ischema_names.get(coltype)(int(r[4]))
-            else:
-                try:
-                    coltype = self.ischema_names[coltype]
-                except KeyError:
-                    util.warn("Did not recognize type '%s' of column '%s'" %
-                        (coltype, r[0]))
-                    coltype = sa_types.NULLTYPE
-
-            sa_columns.append({
-                'name': self.normalize_name(r[0]),
-                'type': coltype,
-                'nullable': r[3] == 'Y',
-                'default': r[7] or None,
-                'autoincrement': r[6] == 'J',
+    def _get_all_columns(self, connection, schema=None, table_names=None):
+        sa_columns = {}
+
+        for r in self._execute_catalog(connection, self._columns_query,
+                                    schema, table_names):
+            sa_columns.setdefault(self.normalize_name(r[0]), []).append({
+                'name': self.normalize_name(r[1]),
+                'type': self._column_type(r[2], r[5], r[6], r[1]),
+                'nullable': r[4] == 'Y',
+                'default': r[8] or None,
+                'autoincrement': r[7] == 'J',
             })
 
         return sa_columns
 
-    @reflection.cache
-    def get_primary_keys(self, connection, table_name, schema=None, **kw):
-        current_schema = self.denormalize_name(
-            schema or self.default_schema_name)
-        table_name = self.denormalize_name(table_name)
+    def _primary_keys_query(self, table_filter):
         sysindexes = self.sys_indexes
         syskeys = self.sys_keys
-
-        query = sql.select(
-            [syskeys.c.colname],
+        return sql.select(
+            [sysindexes.c.tbname, syskeys.c.colname],
             sql.and_(
-                sysindexes.c.tbcreator == current_schema,
-                sysindexes.c.tbname == table_name,
+                sysindexes.c.tbcreator == _schema_param(),
                 sysindexes.c.creator == syskeys.c.ixcreator,
                 sysindexes.c.name == syskeys.c.ixname,
                 sysindexes.c.uniquerule == 'P',
+                *table_filter(sysindexes.c.tbname)
             ),
-            order_by=[syskeys.c.colseq],
+            order_by=[sysindexes.c.tbname, syskeys.c.colseq],
         )
 
-        pk_columns = []
-        for r in connection.execute(query):
-            pk_columns.append(r[0])
+    def _get_all_primary_keys(self, connection, schema=None, table_names=None):
+        pk_columns = {}
+        for r in self._execute_catalog(connection, self._primary_keys_query,
+                                    schema, table_names):
+            pk_columns.setdefault(self.normalize_name(r[0]), []).append(
+                self.normalize_name(r[1]))
 
-        return [self.normalize_name(col) for col in pk_columns]
+        return pk_columns
 
-    @reflection.cache
-    def get_foreign_keys(self, connection, table_name, schema=None, **kw):
-        current_schema = self.denormalize_name(
-            schema or self.default_schema_name)
-        table_name = self.denormalize_name(table_name)
+    def _foreign_keys_query(self, table_filter):
         sysrels = self.sys_rels
         sysfkeys = self.sys_foreignkeys
         syscols = self.sys_columns
-
-        query = sql.select(
+        return sql.select(
             [
                 sysfkeys.c.relname,
                 sysfkeys.c.creator,
@@ -876,20 +1832,24 @@ class ZOSReflector(BaseReflector):
                 syscols.c.name,
             ],
             sql.and_(
-                sysfkeys.c.creator == current_schema,
-                sysfkeys.c.tbname == table_name,
+                sysfkeys.c.creator == _schema_param(),
                 sysfkeys.c.relname == sysrels.c.relname,
                 sysfkeys.c.creator == sysrels.c.creator,
                 sysfkeys.c.tbname == sysrels.c.tbname,
                 sysrels.c.reftbcreator == syscols.c.tbcreator,
                 sysrels.c.reftbname == syscols.c.tbname,
                 sysfkeys.c.colseq == syscols.c.colno,
+                *table_filter(sysfkeys.c.tbname)
             ),
-            order_by=[sysfkeys.c.relname, sysfkeys.c.colseq],
+            order_by=[sysfkeys.c.tbname, sysfkeys.c.relname,
+                      sysfkeys.c.colseq],
         )
 
-        fschema = {}
-        for r in connection.execute(query):
+    def _get_all_foreign_keys(self, connection, schema=None, table_names=None):
+        tables = {}
+        for r in self._execute_catalog(connection, self._foreign_keys_query,
+                                    schema, table_names):
+            fschema = tables.setdefault(self.normalize_name(r[2]), {})
             if not fschema.has_key(r[0]):
                 fschema[r[0]] = {
                     'name' : self.normalize_name(r[0]),
@@ -904,41 +1864,51 @@ class ZOSReflector(BaseReflector):
                 fschema[r[0]]['referred_columns'].append(
                     self.normalize_name(r[6]))
 
-        return [value for key, value in
-            sorted(fschema.items(), key=lambda x: x[0])]
+        return dict(
+            (table, [value for key, value in
+                        sorted(fschema.items(), key=lambda x: x[0])])
+            for table, fschema in tables.iteritems()
+        )
 
-    @reflection.cache
-    def get_indexes(self, connection, table_name, schema=None, **kw):
-        current_schema = self.denormalize_name(
-            schema or self.default_schema_name)
-        table_name = self.denormalize_name(table_name)
+    def _indexes_query(self, table_filter):
         sysidx = self.sys_indexes
         syskeys = self.sys_keys
-
-        query = sql.select(
+        return sql.select(
             [
+                sysidx.c.tbname,
                 sysidx.c.name,
                 sysidx.c.uniquerule,
+                sysidx.c.clustering,
+                sysidx.c.fullkeycardf,
+                sysidx.c.clusterratiof,
                 syskeys.c.colname,
+                syskeys.c.ordering,
             ],
             sql.and_(
-                sysidx.c.tbcreator == current_schema,
-                sysidx.c.tbname == table_name,
+                sysidx.c.tbcreator == _schema_param(),
                 sysidx.c.creator == syskeys.c.ixcreator,
                 sysidx.c.name == syskeys.c.ixname,
-                sysidx.c.uniquerule != 'P',
+                *table_filter(sysidx.c.tbname)
             ),
-            order_by=[sysidx.c.name, syskeys.c.colseq],
+            order_by=[sysidx.c.tbname, sysidx.c.name, syskeys.c.colseq],
         )
 
-        indexes = []
+    # SYSIBM.SYSKEYS.ORDERING is blank for INCLUDE columns
+    def _get_all_indexes(self, connection, schema=None, table_names=None):
+        indexes = {}
         for r, group in itertools.groupby(
-            connection.execute(query),
-            lambda r: (r[0], r[1])
+            self._execute_catalog(connection, self._indexes_query,
+                                  schema, table_names),
+            lambda r: tuple(r[0:6])
         ):
-            indexes.append({
-                'name': self.normalize_name(r[0]),
-                'column_names': [self.normalize_name(x[2]) for x in group],
-                'unique': r[1] != 'D',
-            })
+            full_key_cardinality = r[4]
+            if full_key_cardinality is not None:
+                full_key_cardinality = long(full_key_cardinality)
+            indexes.setdefault(self.normalize_name(r[0]), []).append(
+                self._index(r[1], r[2] != 'D',
+                            [(x[6], x[7]) for x in group],
+                            primary_key=r[2] == 'P',
+                            clustered=r[3] == 'Y',
+                            full_key_cardinality=full_key_cardinality,
+                            cluster_ratio=r[5]))
         return indexes
@@ -0,0 +1,281 @@
+"""A DBAPI module standing in for ibm_db_dbi, so that the dialect's
+execution paths can be tested without a server.
+
+Statements are recorded in ``log``; ``respond(sql, params)`` gives the
+rows of a query, and ``columns`` their names and ibm_db type codes.
+"""
+
+import sys
+
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import registry
+
+registry.register("db2.ibm_db", "ibm_db_sa.ibm_db", "DB2Dialect_ibm_db")
+registry.register("db2.ibm_db400", "ibm_db_sa.ibm_db", "AS400Dialect_ibm_db")
+
+paramstyle = 'qmark'
+apilevel = '2.0'
+threadsafety = 1
+
+
+class Error(Exception):
+    pass
+
+
+class Warning(Exception):
+    pass
+
+
+class InterfaceError(Error):
+    pass
+
+
+class DatabaseError(Error):
+    pass
+
+
+class DataError(DatabaseError):
+    pass
+
+
+class OperationalError(DatabaseError):
+    pass
+
+
+class IntegrityError(DatabaseError):
+    pass
+
+
+class InternalError(DatabaseError):
+    pass
+
+
+class ProgrammingError(DatabaseError):
+    pass
+
+
+class NotSupportedError(DatabaseError):
+    pass
+
+
+def _get_exception(inst):
+    return DatabaseError(str(inst))
+
+
+class DBAPITypeObject(frozenset):
+    """Equal to the ibm_db type names of its type, as in ibm_db_dbi."""
+
+    def __eq__(self, type_name):
+        return frozenset.__contains__(self, type_name)
+
+    def __ne__(self, type_name):
+        return not self == type_name
+
+    def __hash__(self):
+        return id(self)
+
+STRING = DBAPITypeObject(("CHARACTER", "CHAR", "VARCHAR", "STRING"))
+NUMBER = DBAPITypeObject(("INTEGER", "INT", "SMALLINT"))
+DECIMAL = DBAPITypeObject(("DECIMAL", "DEC", "NUMERIC", "NUM"))
+DATETIME = DBAPITypeObject(("TIMESTAMP",))
+
+
+log = []
+columns = []
+
+
+def default_respond(sql, params):
+    if sql.startswith('SELECT'):
+        return [(u'test',)]
+    return []
+
+def default_rowcount(sql, params):
+    return 1
+
+respond = default_respond
+rowcount = default_rowcount
+
+
+def reset():
+    global respond, rowcount, columns
+    del log[:]
+    columns = []
+    respond = default_respond
+    rowcount = default_rowcount
+
+
+class Statement(object):
+    """An ibm_db statement handle."""
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.rows = []
+
+    def execute(self, params):
+        self.rows = list(respond(self.sql, params))
+
+
+class Cursor(object):
+
+    arraysize = 1
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.conn_handler = connection.conn_handler
+        self.stmt_handler = None
+        self.description = None
+        self.rowcount = -1
+
+    def execute(self, sql, params=()):
+        log.append((sql, tuple(params)))
+        self.stmt_handler = Statement(sql)
+        self.stmt_handler.execute(params)
+        if self.stmt_handler.rows or sql.startswith('SELECT'):
+            names = [name for name, type_code in columns] or \
+                    ['C%d' % i for i in range(len(self.stmt_handler.rows and
+                                                  self.stmt_handler.rows[0]))]
+            self.description = [(name, None, None, None, None, None, None)
+                                for name in names]
+            self.rowcount = -1
+        else:
+            self.description = None
+            self.rowcount = rowcount(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        log.append((sql, [tuple(params) for params in seq_of_params]))
+        self.description = None
+        self.rowcount = len(seq_of_params)
+
+    def _rows(self):
+        if self.description is None:
+            raise ProgrammingError("No result set")
+        return self.stmt_handler.rows
+
+    def fetchone(self):
+        rows = self._rows()
+        return rows and rows.pop(0) or None
+
+    def fetchmany(self, size=None):
+        size = size or self.arraysize
+        rows = self._rows()
+        self.stmt_handler.rows = rows[size:]
+        return rows[:size]
+
+    def fetchall(self):
+        rows, self.stmt_handler.rows = self._rows(), []
+        return rows
+
+    @property
+    def last_identity_val(self):
+        return 1
+
+    def close(self):
+        pass
+
+
+class Connection(object):
+
+    conn_handler = 'conn'
+
+    def cursor(self):
+        return Cursor(self)
+
+    def server_info(self):
+        return ('DB2/LINUXX8664', '11.01.0405')
+
+    def get_current_schema(self):
+        return 'MYSCHEMA'
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def connect(*args, **kw):
+    return Connection()
+
+
+class ibm_db(object):
+    """The functions of the ibm_db module used by the dialect."""
+
+    @staticmethod
+    def prepare(conn_handler, sql):
+        return Statement(sql)
+
+    @staticmethod
+    def execute_many(stmt, seq_of_params):
+        types = [type(value) for value in seq_of_params[0]]
+        for i, params in enumerate(seq_of_params):
+            if [type(value) for value in params] != types:
+                raise Exception("Value parameters array %d is not "
+                                "homogeneous with previous parameters "
+                                "array" % i)
+        log.append((stmt.sql, list(seq_of_params)))
+        return len(seq_of_params)
+
+    @staticmethod
+    def execute(stmt, params):
+        log.append((stmt.sql, params))
+        stmt.execute(params)
+        return True
+
+    @staticmethod
+    def num_rows(stmt):
+        return stmt.sql.startswith('SELECT') and -1 or 1
+
+    @staticmethod
+    def num_fields(stmt):
+        return stmt.sql.startswith('SELECT') and len(columns) or 0
+
+    @staticmethod
+    def field_name(stmt, i):
+        return columns[i][0]
+
+    @staticmethod
+    def field_type(stmt, i):
+        return columns[i][1]
+
+    @staticmethod
+    def field_display_size(stmt, i):
+        return 10
+
+    @staticmethod
+    def field_precision(stmt, i):
+        return 10
+
+    @staticmethod
+    def field_scale(stmt, i):
+        return 0
+
+    @staticmethod
+    def field_nullable(stmt, i):
+        return True
+
+    @staticmethod
+    def fetch_tuple(stmt):
+        return stmt.rows and tuple(stmt.rows.pop(0)) or False
+
+    @staticmethod
+    def free_result(stmt):
+        return True
+
+    @staticmethod
+    def free_stmt(stmt):
+        return True
+
+    @staticmethod
+    def stmt_errormsg(stmt=None):
+        return ''
+
+
+def engine(url='db2+ibm_db://user:pass@host/db', **kw):
+    reset()
+    e = create_engine(url, module=sys.modules[__name__], **kw)
+    e.connect().close()
+    del log[:]
+    return e
@@ -0,0 +1,399 @@
+from sqlalchemy import MetaData, Table, Column, Integer, String, Sequence, \
+    Unicode, select, literal_column, desc
+from sqlalchemy import exc
+from sqlalchemy.testing import fixtures, AssertsCompiledSQL, \
+    assert_raises_message, eq_
+
+from ibm_db_sa import base, merge, keyset_select
+
+
+class SelectSuffixTest(fixtures.TestBase, AssertsCompiledSQL):
+    __dialect__ = base.DB2Dialect()
+
+    t = Table('t', MetaData(), Column('id', Integer), Column('x', String(10)))
+
+    def test_offset_wrapper(self):
+        s = select([self.t]).order_by(self.t.c.id).offset(10).\
+                with_hint(self.t, "WITH UR", "db2").\
+                execution_options(db2_optimize_for=5)
+        self.assert_compile(s,
+            "SELECT anon_1.id, anon_1.x FROM (SELECT t.id AS id, t.x AS x, "
+            "ROW_NUMBER() OVER (ORDER BY t.id) AS db2_rn FROM t) AS anon_1 "
+            "WHERE db2_rn > :db2_rn_1 OPTIMIZE FOR 5 ROWS WITH UR")
+
+    def test_subquery(self):
+        s = select([self.t.c.id]).execution_options(db2_read_only=True)
+        self.assert_compile(select([s.alias()]),
+            "SELECT anon_1.id FROM (SELECT t.id AS id FROM t) AS anon_1")
+
+    def test_execution_options(self):
+        s = select([self.t.c.id])
+        self.assert_compile(s.execution_options(db2_read_only=True),
+            "SELECT t.id FROM t FOR READ ONLY")
+        self.assert_compile(s.execution_options(db2_optimize_for=20),
+            "SELECT t.id FROM t OPTIMIZE FOR 20 ROWS")
+        self.assert_compile(s.execution_options(db2_isolation='ur'),
+            "SELECT t.id FROM t WITH UR")
+        self.assert_compile(s.execution_options(db2_isolation='RS',
+                                                db2_optimize_for=1,
+                                                db2_read_only=True),
+            "SELECT t.id FROM t FOR READ ONLY OPTIMIZE FOR 1 ROWS WITH RS")
+
+    def test_hints(self):
+        s = select([self.t.c.id])
+        self.assert_compile(
+            s.with_hint(self.t, "FOR FETCH ONLY OPTIMIZE FOR 1 ROW WITH CS",
+                        "db2"),
+            "SELECT t.id FROM t FOR READ ONLY OPTIMIZE FOR 1 ROWS WITH CS")
+        self.assert_compile(
+            s.with_hint(self.t, "WITH UR", "oracle"),
+            "SELECT t.id FROM t")
+
+    def test_for_update(self):
+        s = select([self.t.c.id], for_update=True)
+        self.assert_compile(s.execution_options(db2_isolation='RS'),
+            "SELECT t.id FROM t FOR UPDATE WITH RS")
+        assert_raises_message(exc.CompileError,
+            "FOR READ ONLY can't be combined with FOR UPDATE",
+            s.execution_options(db2_read_only=True).compile,
+            dialect=self.__dialect__)
+
+    def test_errors(self):
+        s = select([self.t.c.id])
+        assert_raises_message(exc.CompileError,
+            "Unsupported DB2 hint: 'WITH NC'",
+            s.with_hint(self.t, "WITH NC", "db2").compile,
+            dialect=self.__dialect__)
+        assert_raises_message(exc.CompileError,
+            "Unknown isolation clause: WITH NC",
+            s.execution_options(db2_isolation='NC').compile,
+            dialect=self.__dialect__)
+
+
+class InListTest(fixtures.TestBase, AssertsCompiledSQL):
+    __dialect__ = base.DB2Dialect(in_list_bucketing=True,
+                                  in_list_values_threshold=4)
+
+    t = Table('t', MetaData(), Column('id', Integer), Column('x', String(10)))
+
+    def test_not_bucketed_by_default(self):
+        self.assert_compile(self.t.c.id.in_([1, 2, 3]),
+            "t.id IN (:id_1, :id_2, :id_3)",
+            dialect=base.DB2Dialect())
+
+    def test_padded_to_power_of_two(self):
+        self.assert_compile(self.t.c.id.in_([1, 2, 3]),
+            "t.id IN (:id_1, :id_2, :id_3, :id_3)",
+            checkparams={'id_1': 1, 'id_2': 2, 'id_3': 3})
+        self.assert_compile(self.t.c.id.in_([1, 2]),
+            "t.id IN (:id_1, :id_2)")
+        self.assert_compile(self.t.c.id.in_([1]),
+            "t.id IN (:id_1)")
+
+    def test_not_in(self):
+        self.assert_compile(~self.t.c.id.in_([1, 2, 3]),
+            "t.id NOT IN (:id_1, :id_2, :id_3, :id_3)")
+
+    def test_positional(self):
+        self.assert_compile(self.t.c.id.in_([1, 2, 3]),
+            "t.id IN (?, ?, ?, ?)", checkpositional=(1, 2, 3, 3),
+            dialect=base.DB2Dialect(in_list_bucketing=True,
+                                    paramstyle='qmark'))
+
+    def test_values_table_above_threshold(self):
+        self.assert_compile(self.t.c.x.in_(['a', 'b', 'c', 'd', 'e']),
+            "t.x IN (SELECT db2_in.v FROM (VALUES "
+            "CAST(:x_1 AS VARCHAR(10)), CAST(:x_2 AS VARCHAR(10)), "
+            "CAST(:x_3 AS VARCHAR(10)), CAST(:x_4 AS VARCHAR(10)), "
+            "CAST(:x_5 AS VARCHAR(10)), CAST(:x_5 AS VARCHAR(10)), "
+            "CAST(:x_5 AS VARCHAR(10)), CAST(:x_5 AS VARCHAR(10))) "
+            "AS db2_in (v))")
+
+    def test_values_table_unsized_strings(self):
+        t = Table('t', MetaData(), Column('x', String), Column('y', Unicode))
+        self.assert_compile(t.c.x.in_(['a', 'b', 'c', 'd', 'e']),
+            "t.x IN (SELECT db2_in.v FROM (VALUES "
+            "CAST(:x_1 AS VARCHAR(32672)), CAST(:x_2 AS VARCHAR(32672)), "
+            "CAST(:x_3 AS VARCHAR(32672)), CAST(:x_4 AS VARCHAR(32672)), "
+            "CAST(:x_5 AS VARCHAR(32672)), CAST(:x_5 AS VARCHAR(32672)), "
+            "CAST(:x_5 AS VARCHAR(32672)), CAST(:x_5 AS VARCHAR(32672))) "
+            "AS db2_in (v))")
+        cast = "CAST(:y_%d AS VARGRAPHIC(16336))"
+        self.assert_compile(t.c.y.in_([u'a', u'b', u'c', u'd', u'e']),
+            "t.y IN (SELECT db2_in.v FROM (VALUES %s) AS db2_in (v))" %
+                ", ".join(cast % i for i in [1, 2, 3, 4, 5, 5, 5, 5]))
+
+    def test_non_bound_values(self):
+        self.assert_compile(
+            self.t.c.id.in_([1, 2, literal_column('3')]),
+            "t.id IN (:id_1, :id_2, 3)")
+        self.assert_compile(
+            self.t.c.id.in_(select([self.t.c.id])),
+            "t.id IN (SELECT t.id FROM t)")
+
+
+class MergeTest(fixtures.TestBase, AssertsCompiledSQL):
+    __dialect__ = base.DB2Dialect()
+
+    t = Table('t', MetaData(), Column('id', Integer, primary_key=True),
+              Column('x', String(10)), Column('y', Integer))
+
+    s = Table('s', MetaData(), Column('id', Integer), Column('x', String(10)))
+
+    rows = [{'id': 1, 'x': 'a'}, {'id': 2, 'x': 'b'}]
+
+    def test_values(self):
+        self.assert_compile(merge(self.t, self.rows),
+            "MERGE INTO t USING (VALUES "
+            "(CAST(:id_1 AS INT), CAST(:x_1 AS VARCHAR(10))), "
+            "(CAST(:id_2 AS INT), CAST(:x_2 AS VARCHAR(10)))) "
+            "AS db2_src (id, x) ON t.id = db2_src.id "
+            "WHEN MATCHED THEN UPDATE SET x = db2_src.x "
+            "WHEN NOT MATCHED THEN INSERT (id, x) "
+            "VALUES (db2_src.id, db2_src.x)",
+            checkparams={'id_1': 1, 'x_1': 'a', 'id_2': 2, 'x_2': 'b'})
+
+    def test_unsized_strings(self):
+        t = Table('t', MetaData(), Column('id', Integer, primary_key=True),
+                  Column('x', String), Column('y', Unicode))
+        self.assert_compile(merge(t, [{'id': 1, 'x': 'a', 'y': u'b'}]),
+            "MERGE INTO t USING (VALUES (CAST(:id_1 AS INT), "
+            "CAST(:x_1 AS VARCHAR(32672)), CAST(:y_1 AS VARGRAPHIC(16336)))) "
+            "AS db2_src (id, x, y) ON t.id = db2_src.id "
+            "WHEN MATCHED THEN UPDATE SET x = db2_src.x, y = db2_src.y "
+            "WHEN NOT MATCHED THEN INSERT (id, x, y) "
+            "VALUES (db2_src.id, db2_src.x, db2_src.y)")
+
+    def test_select(self):
+        self.assert_compile(
+            merge(self.t, select([self.s.c.x, self.s.c.id]).
+                                where(self.s.c.id > 5)),
+            "MERGE INTO t USING (SELECT s.x AS x, s.id AS id FROM s "
+            "WHERE s.id > :id_1) AS db2_src (x, id) ON t.id = db2_src.id "
+            "WHEN MATCHED THEN UPDATE SET x = db2_src.x "
+            "WHEN NOT MATCHED THEN INSERT (x, id) "
+            "VALUES (db2_src.x, db2_src.id)")
+
+    def test_matched_only(self):
+        self.assert_compile(merge(self.t, self.rows, insert=False),
+            "MERGE INTO t USING (VALUES "
+            "(CAST(:id_1 AS INT), CAST(:x_1 AS VARCHAR(10))), "
+            "(CAST(:id_2 AS INT), CAST(:x_2 AS VARCHAR(10)))) "
+            "AS db2_src (id, x) ON t.id = db2_src.id "
+            "WHEN MATCHED THEN UPDATE SET x = db2_src.x")
+
+    def test_not_matched_only(self):
+        self.assert_compile(merge(self.t, self.rows, update=()),
+            "MERGE INTO t USING (VALUES "
+            "(CAST(:id_1 AS INT), CAST(:x_1 AS VARCHAR(10))), "
+            "(CAST(:id_2 AS INT), CAST(:x_2 AS VARCHAR(10)))) "
+            "AS db2_src (id, x) ON t.id = db2_src.id "
+            "WHEN NOT MATCHED THEN INSERT (id, x) "
+            "VALUES (db2_src.id, db2_src.x)")
+
+    def test_on(self):
+        self.assert_compile(
+            merge(self.t, [{'id': 1, 'x': 'a', 'y': 2}], on=['x'],
+                  update=[self.t.c.y]),
+            "MERGE INTO t USING (VALUES (CAST(:id_1 AS INT), "
+            "CAST(:x_1 AS VARCHAR(10)), CAST(:y_1 AS INT))) "
+            "AS db2_src (id, x, y) ON t.x = db2_src.x "
+            "WHEN MATCHED THEN UPDATE SET y = db2_src.y "
+            "WHEN NOT MATCHED THEN INSERT (id, x, y) "
+            "VALUES (db2_src.id, db2_src.x, db2_src.y)")
+
+    def test_errors(self):
+        assert_raises_message(exc.ArgumentError,
+            "merge\(\) requires columns to update or insert=True",
+            merge, self.t, self.rows, update=(), insert=False)
+        assert_raises_message(exc.ArgumentError,
+            "merge\(\) requires columns to update or insert=True",
+            merge, self.t, [{'id': 1}], insert=False)
+        assert_raises_message(exc.ArgumentError,
+            "merge\(\) requires at least one row",
+            merge, self.t, [])
+        assert_raises_message(exc.ArgumentError,
+            "All the rows given to merge\(\) must have the same keys",
+            merge, self.t, [{'id': 1, 'x': 'a'}, {'id': 2}])
+        assert_raises_message(exc.ArgumentError,
+            "Unknown columns for table t: z",
+            merge, self.t, [{'id': 1, 'z': 'a'}])
+        assert_raises_message(exc.ArgumentError,
+            "merge\(\) requires key columns, given a value in every row",
+            merge, self.t, [{'x': 'a'}])
+        assert_raises_message(exc.ArgumentError,
+            "merge\(\) can only update columns given a value in every row",
+            merge, self.t, self.rows, update=['y'])
+
+
+class ReturningTest(fixtures.TestBase, AssertsCompiledSQL):
+    __dialect__ = base.DB2Dialect()
+
+    t = Table('t', MetaData(), Column('id', Integer, primary_key=True),
+              Column('x', String(10)))
+
+    def test_insert(self):
+        self.assert_compile(
+            self.t.insert().values(x='a').returning(self.t.c.id, self.t.c.x),
+            "SELECT db2_changed.id, db2_changed.x FROM FINAL TABLE "
+            "(INSERT INTO t (x) VALUES (:x)) AS db2_changed")
+
+    def test_multi_row_insert(self):
+        self.assert_compile(
+            self.t.insert().values([{'x': 'a'}, {'x': 'b'}]).
+                    returning(self.t.c.id),
+            "SELECT db2_changed.id FROM FINAL TABLE "
+            "(INSERT INTO t (x) VALUES (:x_0), (:x_1)) AS db2_changed")
+
+    def test_update(self):
+        self.assert_compile(
+            self.t.update().where(self.t.c.id == 5).values(x='a').
+                    returning(self.t.c.x),
+            "SELECT db2_changed.x FROM FINAL TABLE "
+            "(UPDATE t SET x=:x WHERE t.id = :id_1) AS db2_changed")
+
+    def test_delete(self):
+        self.assert_compile(
+            self.t.delete().where(self.t.c.id == 5).
+                    returning(self.t.c.id, (self.t.c.id + 1).label('n')),
+            "SELECT db2_changed.id, db2_changed.id + :id_2 AS n "
+            "FROM OLD TABLE (DELETE FROM t WHERE t.id = :id_1) "
+            "AS db2_changed")
+
+    def test_implicit_returning(self):
+        self.assert_compile(self.t.insert(),
+            "SELECT db2_changed.id FROM FINAL TABLE "
+            "(INSERT INTO t (x) VALUES (:x)) AS db2_changed",
+            params={'x': 'a'})
+        self.assert_compile(self.t.insert(),
+            "INSERT INTO t (x) VALUES (:x)", params={'x': 'a'},
+            dialect=base.DB2Dialect(implicit_returning=False))
+        self.assert_compile(self.t.insert(),
+            "INSERT INTO t (x) VALUES (:x)", params={'x': 'a'},
+            dialect=base.AS400Dialect())
+
+
+class SequencePrefetchTest(fixtures.TestBase, AssertsCompiledSQL):
+    __dialect__ = base.DB2Dialect(sequence_prefetch=10)
+
+    t = Table('t', MetaData(),
+              Column('id', Integer, Sequence('s'), primary_key=True),
+              Column('x', String(10)),
+              Column('y', Integer, Sequence('s2')))
+
+    def test_not_prefetched(self):
+        self.assert_compile(self.t.insert(),
+            "SELECT db2_changed.id FROM FINAL TABLE "
+            "(INSERT INTO t (id, x, y) "
+            "VALUES (NEXT VALUE FOR s, :x, NEXT VALUE FOR s2)) "
+            "AS db2_changed",
+            params={'x': 'a'}, dialect=base.DB2Dialect())
+
+    def test_prefetch(self):
+        self.assert_compile(self.t.insert(),
+            "INSERT INTO t (id, x, y) VALUES (:id, :x, :y)",
+            params={'x': 'a'})
+        c = self.t.insert().compile(dialect=self.__dialect__,
+                                    column_keys=['x'])
+        eq_(c.prefetch, [self.t.c.id, self.t.c.y])
+        eq_(c.returning, [])
+        eq_(c.postfetch, [])
+
+    def test_inline(self):
+        self.assert_compile(self.t.insert(inline=True),
+            "INSERT INTO t (id, x, y) "
+            "VALUES (NEXT VALUE FOR s, :x, NEXT VALUE FOR s2)",
+            params={'x': 'a'})
+
+    def test_given_value(self):
+        self.assert_compile(self.t.insert(),
+            "INSERT INTO t (id, x, y) VALUES (:id, :x, :y)",
+            params={'id': 5, 'x': 'a'})
+
+    def test_multi_row_insert(self):
+        self.assert_compile(
+            self.t.insert().values([{'x': 'a'}, {'x': 'b'}]),
+            "SELECT db2_changed.id FROM FINAL TABLE "
+            "(INSERT INTO t (id, x, y) VALUES "
+            "(NEXT VALUE FOR s, :x_0, NEXT VALUE FOR s2), "
+            "(NEXT VALUE FOR s, :x_1, NEXT VALUE FOR s2)) AS db2_changed")
+
+
+class OffsetFetchTest(fixtures.TestBase, AssertsCompiledSQL):
+
+    t = Table('t', MetaData(), Column('id', Integer), Column('x', String(10)))
+
+    def _dialect(self, supports_offset_fetch):
+        dialect = base.DB2Dialect()
+        dialect.supports_offset_fetch = supports_offset_fetch
+        return dialect
+
+    def test_native(self):
+        dialect = self._dialect(True)
+        s = select([self.t]).order_by(self.t.c.id)
+        self.assert_compile(s.limit(5).offset(10),
+            "SELECT t.id, t.x FROM t ORDER BY t.id "
+            "OFFSET :param_1 ROWS FETCH NEXT 5 ROWS ONLY",
+            checkparams={'param_1': 10}, dialect=dialect)
+        self.assert_compile(s.offset(10),
+            "SELECT t.id, t.x FROM t ORDER BY t.id OFFSET :param_1 ROWS",
+            dialect=dialect)
+        self.assert_compile(s.limit(5),
+            "SELECT t.id, t.x FROM t ORDER BY t.id FETCH FIRST 5 ROWS ONLY",
+            dialect=dialect)
+
+    def test_row_number_wrapper(self):
+        s = select([self.t]).order_by(self.t.c.id).limit(5).offset(10)
+        self.assert_compile(s,
+            "SELECT anon_1.id, anon_1.x FROM (SELECT t.id AS id, t.x AS x, "
+            "ROW_NUMBER() OVER (ORDER BY t.id) AS db2_rn FROM t) AS anon_1 "
+            "WHERE db2_rn > :db2_rn_1 AND db2_rn <= :db2_rn_2",
+            checkparams={'db2_rn_1': 10, 'db2_rn_2': 15},
+            dialect=self._dialect(False))
+
+    def test_server_version(self):
+        dialect = base.DB2Dialect()
+        eq_(dialect._parse_server_version("11.01.0405"), (11, 1, 405))
+        eq_(dialect._parse_server_version("10.05.0007"), (10, 5, 7))
+        eq_(dialect._parse_server_version("DSN12015"), (12, 1, 5))
+        eq_(dialect._parse_server_version("unknown"), None)
+        assert (11, 1, 405) >= base.DB2Dialect.offset_fetch_version
+        assert (10, 5, 7) < base.DB2Dialect.offset_fetch_version
+        assert (12, 1, 5) >= base.ZOSDialect.offset_fetch_version
+
+
+class KeysetSelectTest(fixtures.TestBase, AssertsCompiledSQL):
+    __dialect__ = base.DB2Dialect()
+
+    t = Table('t', MetaData(), Column('a', Integer), Column('b', Integer))
+
+    def test_first_page(self):
+        self.assert_compile(
+            keyset_select(select([self.t.c.a]), [self.t.c.a], page_size=10),
+            "SELECT t.a FROM t ORDER BY t.a "
+            "FETCH FIRST 10 ROWS ONLY OPTIMIZE FOR 10 ROWS")
+
+    def test_after(self):
+        self.assert_compile(
+            keyset_select(select([self.t]), [self.t.c.a, self.t.c.b],
+                          after=(1, 2), page_size=10),
+            "SELECT t.a, t.b FROM t WHERE t.a >= :a_1 AND "
+            "(t.a > :a_2 OR t.a = :a_3 AND t.b > :b_1) ORDER BY t.a, t.b "
+            "FETCH FIRST 10 ROWS ONLY OPTIMIZE FOR 10 ROWS",
+            checkparams={'a_1': 1, 'a_2': 1, 'a_3': 1, 'b_1': 2})
+
+    def test_descending(self):
+        self.assert_compile(
+            keyset_select(select([self.t]), [desc(self.t.c.a), self.t.c.b],
+                          after=(1, 2), page_size=10),
+            "SELECT t.a, t.b FROM t WHERE t.a <= :a_1 AND "
+            "(t.a < :a_2 OR t.a = :a_3 AND t.b > :b_1) "
+            "ORDER BY t.a DESC, t.b "
+            "FETCH FIRST 10 ROWS ONLY OPTIMIZE FOR 10 ROWS")
+
+    def test_ordered_select(self):
+        s = select([self.t]).where(self.t.c.b > 5).order_by(self.t.c.b)
+        self.assert_compile(
+            keyset_select(s, [self.t.c.a], after=(1,), page_size=10),
+            "SELECT t.a, t.b FROM t WHERE t.b > :b_1 AND t.a > :a_1 "
+            "ORDER BY t.a FETCH FIRST 10 ROWS ONLY OPTIMIZE FOR 10 ROWS")
@@ -0,0 +1,487 @@
+import datetime
+import os
+import tempfile
+import warnings
+
+from sqlalchemy import MetaData, Table, Column, Integer, Sequence, text, \
+    event, exc, types
+from sqlalchemy.schema import CreateTable, DropTable, CreateSequence, \
+    CreateIndex, Index
+from sqlalchemy.engine import reflection
+from sqlalchemy.testing import fixtures, eq_, assert_raises
+
+from ibm_db_sa import base, reflection as ibm_reflection
+
+import fakedbapi
+
+
+class _Connection(object):
+    pass
+
+
+class NameCacheTest(fixtures.TestBase):
+
+    def test_normalize(self):
+        dialect = base.DB2Dialect()
+        eq_([dialect.normalize_name(name) for name in
+                ('MYTABLE', 'MyTable', 'MYTABLE', None)],
+            ['mytable', 'MyTable', 'mytable', None])
+        eq_([dialect.denormalize_name(name) for name in
+                ('mytable', 'MyTable', 'mytable')],
+            ['MYTABLE', 'MyTable', 'MYTABLE'])
+        stats = dialect.name_cache_stats()
+        eq_((stats['normalize']['hits'], stats['normalize']['misses']),
+            (1, 2))
+        eq_((stats['denormalize']['hits'], stats['denormalize']['misses']),
+            (1, 2))
+
+    def test_uppercase_quoted_identifier(self):
+        dialect = base.DB2Dialect()
+        eq_(dialect.normalize_name('SELECT'), 'SELECT')
+        dialect.uppercase_quoted_identifier = True
+        eq_(dialect.normalize_name('SELECT'), 'select')
+
+    def test_bounded(self):
+        names = ibm_reflection.NameCache(lambda name: name.lower(), size=2)
+        eq_([names(name) for name in ('A', 'B', 'C', 'C')],
+            ['a', 'b', 'c', 'c'])
+        eq_(names.stats(),
+            {'hits': 1, 'misses': 3, 'size': 1, 'hit_rate': 0.25})
+
+
+class CompiledCatalogQueryTest(fixtures.TestBase):
+
+    def _engine(self):
+        e = fakedbapi.engine()
+        fakedbapi.respond = lambda sql, params: []
+        return e
+
+    def test_compiled_once(self):
+        e = self._engine()
+        conn = e.connect()
+        for name in ('t1', 't2'):
+            e.dialect.get_columns(conn, name)
+            e.dialect.get_columns(conn, name, schema='other')
+        eq_(e.dialect._reflector._compiled_queries.keys(),
+            [('_columns_query', 'table')])
+        eq_(len(set(sql for sql, params in fakedbapi.log)), 1)
+        eq_([params for sql, params in fakedbapi.log],
+            [('MYSCHEMA', 'T1'), ('OTHER', 'T1'),
+             ('MYSCHEMA', 'T2'), ('OTHER', 'T2')])
+
+    def test_schema_and_table_queries(self):
+        e = self._engine()
+        conn = e.connect()
+        reflector = e.dialect._reflector
+        reflector._get_all_columns(conn, 'other')
+        reflector._get_all_columns(conn, 'other', ['t1'])
+        reflector._get_all_columns(conn, 'other', ['t1', 't2'])
+        eq_(sorted(reflector._compiled_queries.keys()),
+            [('_columns_query', 'schema'), ('_columns_query', 'table')])
+        eq_([params for sql, params in fakedbapi.log],
+            [('OTHER',), ('OTHER', 'T1'), ('OTHER', 'T1', 'T2')])
+
+
+class IterNamesTest(fixtures.TestBase):
+
+    def _engine(self, names):
+        e = fakedbapi.engine()
+        fakedbapi.columns = [('NAME', 'string')]
+        def respond(sql, params):
+            page_size = int(sql.split('FETCH FIRST ')[1].split()[0])
+            return [(name,) for name in sorted(names)
+                    if name > params[-1]][:page_size]
+        fakedbapi.respond = respond
+        return e
+
+    def _last_names(self):
+        return [params[-1] for sql, params in fakedbapi.log]
+
+    def test_table_names(self):
+        e = self._engine(['T%d' % i for i in range(1, 6)])
+        conn = e.connect()
+        eq_(list(e.dialect.iter_table_names(conn, page_size=2)),
+            ['t1', 't2', 't3', 't4', 't5'])
+        eq_(self._last_names(), ['', 'T2', 'T4'])
+
+    def test_full_last_page(self):
+        e = self._engine(['T1', 'T2', 'T3', 'T4'])
+        conn = e.connect()
+        eq_(len(list(e.dialect.iter_table_names(conn, page_size=2))), 4)
+        eq_(self._last_names(), ['', 'T2', 'T4'])
+
+    def test_stops_early(self):
+        e = self._engine(['T%d' % i for i in range(1, 6)])
+        conn = e.connect()
+        names = e.dialect.iter_table_names(conn, page_size=2)
+        eq_([names.next() for i in range(2)], ['t1', 't2'])
+        eq_(len(fakedbapi.log), 1)
+
+    def test_schema_names_pattern(self):
+        e = self._engine(['APP1', 'APP2'])
+        conn = e.connect()
+        eq_(list(e.dialect.iter_schema_names(conn, pattern='app%')),
+            ['app1', 'app2'])
+        eq_(fakedbapi.log[0][1], ('SYS%', 'APP%', ''))
+        list(e.dialect.iter_schema_names(conn, pattern='App%'))
+        eq_(fakedbapi.log[1][1], ('SYS%', 'App%', ''))
+
+
+class TableStatisticsTest(fixtures.TestBase):
+
+    def _inspector(self, rows):
+        e = fakedbapi.engine()
+        fakedbapi.columns = [('C%d' % i, 'string') for i in range(5)]
+        fakedbapi.respond = lambda sql, params: rows
+        return reflection.Inspector.from_engine(e)
+
+    def test_collected(self):
+        stats_time = datetime.datetime(2013, 1, 1)
+        insp = self._inspector([(1000, 10, 12, 0, stats_time)])
+        eq_(insp.get_table_statistics('t1'),
+            {'card': 1000, 'npages': 10, 'fpages': 12, 'overflow': 0,
+             'stats_time': stats_time})
+        eq_(insp.get_approximate_row_count('t1', schema='other'), 1000)
+        eq_([params for sql, params in fakedbapi.log],
+            [('MYSCHEMA', 'T1'), ('OTHER', 'T1')])
+
+    def test_not_collected(self):
+        insp = self._inspector([(-1, -1, -1, -1, None)])
+        eq_(insp.get_table_statistics('t1'),
+            {'card': None, 'npages': None, 'fpages': None, 'overflow': None,
+             'stats_time': None})
+        eq_(insp.get_approximate_row_count('t2'), None)
+
+    def test_no_table(self):
+        insp = self._inspector([])
+        assert_raises(exc.NoSuchTableError,
+                      insp.get_approximate_row_count, 't1')
+
+
+class IndexesTest(fixtures.TestBase):
+
+    rows = [('T1', 'T1_PK', 'P', 'REG', 100, 95, None, 'ID', 'A'),
+            ('T1', 'IX1', 'D', 'CLUS', -1, -1, 0.5, 'A', 'D'),
+            ('T1', 'IX1', 'D', 'CLUS', -1, -1, 0.5, 'B', 'A'),
+            ('T1', 'IX1', 'D', 'CLUS', -1, -1, 0.5, 'C', 'I'),
+            ('T1', 'IX2', 'U', 'REG', 50, -1, -1, 'D', 'R')]
+
+    def _inspector(self):
+        e = fakedbapi.engine()
+        fakedbapi.columns = [('C%d' % i, 'string') for i in range(9)]
+        fakedbapi.respond = lambda sql, params: self.rows
+        return reflection.Inspector.from_engine(e)
+
+    def test_indexes(self):
+        eq_(self._inspector().get_indexes('t1'), [
+            {'name': 'ix1', 'column_names': ['a', 'b'],
+             'column_sorting': {'a': ('desc',)}, 'include_columns': ['c'],
+             'unique': False, 'primary_key': False, 'clustered': True,
+             'full_key_cardinality': None, 'cluster_ratio': 0.5},
+            {'name': 'ix2', 'column_names': ['d'],
+             'column_sorting': {'d': ('random',)}, 'include_columns': [],
+             'unique': True, 'primary_key': False, 'clustered': False,
+             'full_key_cardinality': 50, 'cluster_ratio': None}])
+
+    def test_include_primary_key(self):
+        indexes = self._inspector().get_indexes('t1',
+                                                include_primary_key=True)
+        eq_([index['name'] for index in indexes], ['t1_pk', 'ix1', 'ix2'])
+        eq_(indexes[0], {'name': 't1_pk', 'column_names': ['id'],
+             'column_sorting': {}, 'include_columns': [],
+             'unique': True, 'primary_key': True, 'clustered': False,
+             'full_key_cardinality': 100, 'cluster_ratio': 0.95})
+
+
+class ColumnTypeTest(fixtures.TestBase):
+
+    def setup(self):
+        self.reflector = base.DB2Dialect()._reflector
+
+    def _type(self, typename, length=0, scale=0):
+        return self.reflector._column_type(typename, length, scale, 'x')
+
+    def test_types(self):
+        for typename, length, scale, cls, attrs in [
+                ('DECFLOAT', 8, 0, base.DECFLOAT, {'precision': 16}),
+                ('DECFLOAT', 16, 0, base.DECFLOAT, {'precision': 34}),
+                ('DECIMAL', 10, 2, base.DECIMAL,
+                        {'precision': 10, 'scale': 2}),
+                ('VARBINARY', 20, 0, base.VARBINARY, {'length': 20}),
+                ('VARBIN', 20, 0, base.VARBINARY, {'length': 20}),
+                ('VARCHAR   ', 30, 0, base.VARCHAR, {'length': 30})]:
+            coltype = self._type(typename, length, scale)
+            assert isinstance(coltype, cls), (typename, coltype)
+            eq_(dict((k, getattr(coltype, k)) for k in attrs), attrs)
+
+    def test_shared(self):
+        assert self._type('VARCHAR', 30) is self._type('VARCHAR', 30)
+        assert self._type('VARCHAR', 30) is not self._type('VARCHAR', 40)
+
+    def test_unknown_type(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            eq_(self._type('MYTYPE'), types.NULLTYPE)
+            eq_(self._type('MYTYPE', 10), types.NULLTYPE)
+        eq_([str(warning.message) for warning in caught],
+            ["Did not recognize type 'MYTYPE' of column 'x'"])
+
+
+class CatalogCacheTest(fixtures.TestBase):
+
+    def setup(self):
+        self.dialect = base.DB2Dialect(catalog_cache_ttl=60)
+        self.dialect.default_schema_name = u'myschema'
+        self.cache = self.dialect._reflector.catalog_cache
+        self.keys = [('has_table', None, 't', ()),
+                     ('has_table', 'myschema', 'u', ()),
+                     ('get_table_names', 'myschema', None, ()),
+                     ('has_table', 'other', 't', ()),
+                     ('has_sequence', None, 's', ())]
+        for key in self.keys:
+            self.cache.set(key, False)
+
+    def _cached(self):
+        return [key for key in self.keys
+                if self.cache.get(key) is not None]
+
+    def test_table_ddl_invalidates_schema(self):
+        t = Table('t', MetaData(), Column('id', Integer))
+        for ddl in (CreateTable(t), DropTable(t),
+                    CreateIndex(Index('ix', t.c.id))):
+            self.setup()
+            self.dialect._reflector.catalog_changed(_Connection(), ddl)
+            eq_(self._cached(), [('has_table', 'other', 't', ())])
+
+    def test_sequence_ddl_invalidates_sequence(self):
+        self.dialect._reflector.catalog_changed(_Connection(),
+                                            CreateSequence(Sequence('s')))
+        eq_(self._cached(), [self.keys[0], self.keys[1], self.keys[3]])
+
+    def test_text_ddl_invalidates_all(self):
+        self.dialect._reflector.catalog_changed(_Connection(), None)
+        eq_(self._cached(), [])
+
+
+class HasTableTest(fixtures.TestBase):
+
+    def _engine(self, **kw):
+        e = fakedbapi.engine(**kw)
+        fakedbapi.respond = lambda sql, params: [('T1',), ('T2',)]
+        return e
+
+    def test_single_name_lookups(self):
+        e = self._engine()
+        conn = e.connect()
+        for name in ('t1', 't2', 't3'):
+            assert e.dialect.has_table(conn, name)
+        eq_(len(fakedbapi.log), 3)
+
+    def test_bulk_lookups(self):
+        e = self._engine(bulk_has_table=True)
+        conn = e.connect()
+        assert e.dialect.has_table(conn, 't1')
+        eq_(fakedbapi.log[-1][1], ('MYSCHEMA', 'T1'))
+        assert e.dialect.has_table(conn, 't2')
+        eq_(fakedbapi.log[-1][1], ('MYSCHEMA',))
+        assert not e.dialect.has_table(conn, 't3')
+        eq_(len(fakedbapi.log), 2)
+
+    def test_bulk_lookups_end_at_checkin(self):
+        e = self._engine(bulk_has_table=True, pool_size=1)
+        conn = e.connect()
+        e.dialect.has_table(conn, 't1')
+        e.dialect.has_table(conn, 't2')
+        conn.close()
+        conn = e.connect()
+        assert e.dialect.has_table(conn, 't3')
+        eq_(len(fakedbapi.log), 3)
+
+
+class TextDDLTest(fixtures.TestBase):
+
+    def _engine(self, **kw):
+        e = fakedbapi.engine(catalog_cache_ttl=60, **kw)
+        self.tables = [('T1',)]
+        fakedbapi.respond = lambda sql, params: \
+                    sql.startswith('SELECT') and self.tables or []
+        return e
+
+    def _test_drop(self, e, drop):
+        conn = e.connect()
+        assert e.dialect.has_table(conn, 't1')
+        assert e.dialect.has_table(conn, 't1')
+        eq_(len(fakedbapi.log), 1)
+        self.tables = []
+        conn.execute(drop)
+        assert not e.dialect.has_table(conn, 't1')
+        eq_(len(fakedbapi.log), 3)
+
+    def test_text(self):
+        self._test_drop(self._engine(), text("DROP TABLE t1"))
+
+    def test_string(self):
+        self._test_drop(self._engine(), "drop table t1")
+
+    def test_bulk_has_table(self):
+        self._test_drop(self._engine(bulk_has_table=True),
+                        text("DROP TABLE t1"))
+
+    def test_not_ddl(self):
+        e = self._engine()
+        conn = e.connect()
+        assert e.dialect.has_table(conn, 't1')
+        conn.execute(text("UPDATE t1 SET x = 1"))
+        assert e.dialect.has_table(conn, 't1')
+        eq_(len(fakedbapi.log), 2)
+
+
+class ReflectionThreadsTest(fixtures.TestBase):
+
+    def _prefetch(self, begin=False, **kw):
+        e = fakedbapi.engine(bulk_reflection=True, reflection_threads=4, **kw)
+        fakedbapi.respond = lambda sql, params: []
+        checkouts = []
+        conn = e.connect()
+        event.listen(e.pool, 'checkout',
+                     lambda *args: checkouts.append(args))
+        if begin:
+            conn.begin()
+        e.dialect.prefetch_reflection(conn, schema='s')
+        conn.close()
+        eq_(len(fakedbapi.log), 4)
+        return len(checkouts)
+
+    def test_parallel(self):
+        eq_(self._prefetch(), 4)
+
+    def test_capped_by_pool(self):
+        eq_(self._prefetch(pool_size=2, max_overflow=1), 2)
+
+    def test_serial_when_pool_exhausted(self):
+        eq_(self._prefetch(pool_size=1, max_overflow=0), 0)
+
+    def test_serial_in_transaction(self):
+        eq_(self._prefetch(begin=True), 0)
+
+
+class BulkReflectionTest(fixtures.TestBase):
+
+    columns = [('T1', 'ID', 'INTEGER', None, 'N', 4, 0),
+               ('T1', 'X', 'VARCHAR', None, 'Y', 20, 0),
+               ('T2', 'ID', 'INTEGER', None, 'N', 4, 0)]
+
+    def _engine(self, **kw):
+        e = fakedbapi.engine(**kw)
+        fakedbapi.columns = [('C%d' % i, 'string') for i in range(7)]
+        def respond(sql, params):
+            if 'FROM "SYSCAT"."COLUMNS"' not in sql:
+                return []
+            return [r for r in self.columns if r[0] in params[1:] or
+                                               len(params) == 1]
+        fakedbapi.respond = respond
+        return e
+
+    def _names(self, columns):
+        return [c['name'] for c in columns]
+
+    def test_per_table(self):
+        e = self._engine()
+        conn = e.connect()
+        eq_(self._names(e.dialect.get_columns(conn, 't1')), ['id', 'x'])
+        eq_(self._names(e.dialect.get_columns(conn, 't2')), ['id'])
+        eq_([params for sql, params in fakedbapi.log],
+            [('MYSCHEMA', 'T1'), ('MYSCHEMA', 'T2')])
+
+    def test_bulk(self):
+        e = self._engine(bulk_reflection=True)
+        conn = e.connect()
+        eq_(self._names(e.dialect.get_columns(conn, 't1')), ['id', 'x'])
+        eq_(self._names(e.dialect.get_columns(conn, 't2')), ['id'])
+        eq_(e.dialect.get_columns(conn, 't3'), [])
+        eq_([params for sql, params in fakedbapi.log], [('MYSCHEMA',)])
+
+    def test_bulk_ends_with_transaction(self):
+        e = self._engine(bulk_reflection=True)
+        conn = e.connect()
+        trans = conn.begin()
+        e.dialect.get_columns(conn, 't1')
+        trans.commit()
+        e.dialect.get_columns(conn, 't2')
+        conn.close()
+        eq_(len(fakedbapi.log), 2)
+
+    def test_bulk_inspector(self):
+        e = self._engine(bulk_reflection=True)
+        insp = reflection.Inspector.from_engine(e)
+        insp.get_columns('t1')
+        insp.get_columns('t2')
+        eq_(len(fakedbapi.log), 1)
+        reflection.Inspector.from_engine(e).get_columns('t2')
+        eq_(len(fakedbapi.log), 2)
+
+    def test_catalog_cache_copies(self):
+        e = self._engine(catalog_cache_ttl=60)
+        conn = e.connect()
+        e.dialect.get_columns(conn, 't1').pop()
+        eq_(self._names(e.dialect.get_columns(conn, 't1')), ['id', 'x'])
+        eq_(len(fakedbapi.log), 1)
+
+
+class ReflectionSnapshotTest(fixtures.TestBase):
+
+    columns = [('T1', 'ID', 'INTEGER', None, 'N', 4, 0),
+               ('T2', 'ID', 'INTEGER', None, 'N', 4, 0)]
+
+    def setup(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        os.remove(self.path)
+        self.alter_times = {'T1': datetime.datetime(2013, 1, 1),
+                            'T2': datetime.datetime(2013, 1, 1)}
+
+    def teardown(self):
+        os.remove(self.path)
+
+    def _respond(self, sql, params):
+        if 'CURRENT SERVER' in sql:
+            rows = [('SAMPLE',)]
+        elif 'FROM "SYSCAT"."TABLES"' in sql:
+            rows = sorted(self.alter_times.items())
+        elif 'FROM "SYSCAT"."COLUMNS"' in sql:
+            rows = [r for r in self.columns if r[0] in params[1:] or
+                                               len(params) == 1]
+        else:
+            rows = []
+        return [r + (None,) * (7 - len(r)) for r in rows]
+
+    def _columns(self, url='db2+ibm_db://user:pass@host/db'):
+        e = fakedbapi.engine(url, reflection_snapshot=self.path)
+        fakedbapi.columns = [('C%d' % i, 'string') for i in range(7)]
+        fakedbapi.respond = self._respond
+        conn = e.connect()
+        columns = [[c['name'] for c in e.dialect.get_columns(conn, name)]
+                   for name in ('t1', 't2')]
+        conn.close()
+        return columns
+
+    def _columns_queries(self):
+        return [params for sql, params in fakedbapi.log
+                if 'FROM "SYSCAT"."COLUMNS"' in sql]
+
+    def test_save_and_reload(self):
+        eq_(self._columns(), [['id'], ['id']])
+        eq_(self._columns_queries(), [('MYSCHEMA',)])
+        eq_(self._columns(), [['id'], ['id']])
+        eq_(self._columns_queries(), [])
+
+    def test_stale_table(self):
+        self._columns()
+        self.alter_times['T2'] = datetime.datetime(2013, 1, 2)
+        eq_(self._columns(), [['id'], ['id']])
+        eq_(self._columns_queries(), [('MYSCHEMA', 'T2')])
+
+    def test_other_database(self):
+        self._columns()
+        self._columns('db2+ibm_db://user:pass@otherhost/db')
+        eq_(self._columns_queries(), [('MYSCHEMA',)])